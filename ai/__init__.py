@@ -4,38 +4,312 @@ Uses Machine Learning to score leads based on their characteristics
 """
 import numpy as np
 import pickle
+import hashlib
 import os
-from sklearn.ensemble import RandomForestClassifier
+import threading
+import time
+from dataclasses import dataclass
+from sqlalchemy import bindparam
 from datetime import datetime, timedelta
+from database.models import Lead
+from database.db_instance import db
+from database.statistics import adjust_lead_statistics, priority_deltas
+from ai.forest import CompiledForest, export_forest
+from ai.registry import ModelRegistry, atomic_write
+
+# Directory of the bundled model files, and of the versioned registry
+AI_DIR = os.path.dirname(__file__)
+REGISTRY_DIR = os.path.join(AI_DIR, 'models')
+
+# Version reported while no registry version has been activated (suffixed
+# with a digest of the bundled model file)
+BUNDLED_VERSION = 'bundled'
+
+MODEL_FILE = 'lead_scoring_model.pkl'
+FOREST_FILE = 'lead_scoring_forest.npz'
+SCORE_TABLE_FILE = 'lead_scoring_table.npz'
+
+
+@dataclass(frozen=True)
+class ServingModel:
+    """Model, score table and version that serve predictions together."""
+    
+    version: str = None
+    model: object = None
+    score_table: object = None
+
 
 class LeadScoringAI:
     """AI-powered lead scoring system."""
     
-    def __init__(self):
+    # Feature columns read from a Lead, in model input order
+    FEATURE_COLUMNS = ('source', 'company_size', 'engagement_level', 'budget_range', 'timeline')
+    
+    # Categorical encodings and their fallbacks for unknown values
+    SOURCE_MAP = {'website': 1, 'referral': 0, 'cold_call': 2, 'linkedin': 3, 'advertisement': 4, 'other': 5}
+    SOURCE_DEFAULT = 1
+    SIZE_MAP = {'small': 0, 'medium': 1, 'large': 2, 'enterprise': 3}
+    SIZE_DEFAULT = 1
+    BUDGET_MAP = {'unknown': 3, 'low': 0, 'medium': 1, 'high': 2, 'enterprise': 2}
+    BUDGET_DEFAULT = 3
+    TIMELINE_MAP = {'unknown': 2, 'long_term': 2, 'short_term': 1, 'immediate': 0}
+    TIMELINE_DEFAULT = 2
+    
+    # Engagement levels covered by the precomputed score table (0-5)
+    ENGAGEMENT_LEVELS = 6
+    
+    # Point tables for the rule-based fallback scorer
+    RULE_SOURCE_SCORES = {
+        'referral': 25,
+        'linkedin': 20,
+        'website': 15,
+        'cold_call': 10,
+        'advertisement': 10,
+        'other': 5
+    }
+    RULE_SIZE_SCORES = {
+        'enterprise': 25,
+        'large': 20,
+        'medium': 15,
+        'small': 10
+    }
+    RULE_BUDGET_SCORES = {
+        'high': 25,
+        'medium': 15,
+        'low': 10,
+        'unknown': 5
+    }
+    RULE_TIMELINE_SCORES = {
+        'immediate': 20,
+        'short_term': 15,
+        'long_term': 10,
+        'unknown': 5
+    }
+    
+    # Rows per predict() call when scoring in bulk
+    SCORE_CHUNK_SIZE = 50000
+    
+    # Leads per page (and per commit) when re-scoring the whole table
+    RESCORE_BATCH_SIZE = 5000
+    
+    # Seconds between checks of the registry's CURRENT pointer
+    RELOAD_CHECK_INTERVAL = 5
+    
+    def __init__(self, model_dir=None, version=None):
+        """
+        Args:
+            model_dir: Directory of one fixed model version; by default the
+                scorer follows the registry's CURRENT version
+            version: Name reported for the model in model_dir
+        """
         self.model = None
         self.encoders = {}
-        self.model_path = os.path.join(os.path.dirname(__file__), 'lead_scoring_model.pkl')
+        self.score_table = None
         self.is_trained = False
-        self._initialize_model()
+        self.is_loaded = False
+        self.serving = ServingModel()
+        self.registry = ModelRegistry(REGISTRY_DIR)
+        self.follow_registry = model_dir is None
+        self._use_model_dir(model_dir or AI_DIR, version or BUNDLED_VERSION)
+        self._load_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._pointer_stamp = None
+        self._next_reload_check = 0
+    
+    @property
+    def model_version(self):
+        """Version of the model currently serving predictions."""
+        self.warm_up()
+        return self.serving.version
+    
+    def _use_model_dir(self, model_dir, version):
+        """Point the model file paths at one version's directory."""
+        self.version = version
+        self.model_path = os.path.join(model_dir, MODEL_FILE)
+        self.forest_path = os.path.join(model_dir, FOREST_FILE)
+        self.score_table_path = os.path.join(model_dir, SCORE_TABLE_FILE)
     
-    def _initialize_model(self):
-        """Initialize or load the ML model."""
+    def warm_up(self):
+        """
+        Load (or train) the model if it is not loaded yet.
+        
+        Called lazily by every scoring method; call it explicitly to pay the
+        load cost up front, e.g. in the gunicorn master before workers fork.
+        Safe to call from several threads at once.
+        """
+        if self.is_loaded:
+            return
+        with self._load_lock:
+            if not self.is_loaded:
+                if self.follow_registry and self._load_current_version():
+                    self.is_loaded = True
+                    return
+                self._initialize_model()
+                self.is_loaded = True
+    
+    def _load_current_version(self):
+        """
+        Load the registry's CURRENT version, if there is one.
+        
+        Returns:
+            bool: True if it is now serving; False to fall back to the bundled
+                model (the next version check retries the registry)
+        """
+        stamp = self.registry.pointer_stamp()
+        version = self.registry.current_version()
+        if version is None:
+            self._pointer_stamp = stamp
+            return False
+        
+        try:
+            self._use_model_dir(self.registry.version_dir(version), version)
+            self._initialize_model(train_if_missing=False)
+        except Exception as e:
+            print(f"⚠️ Could not load AI Model {version}, using the bundled model: {e}")
+            self._use_model_dir(AI_DIR, BUNDLED_VERSION)
+            self.model = None
+            self.encoders = {}
+            self.is_trained = False
+            return False
+        self._pointer_stamp = stamp
+        return True
+    
+    def _serving_model(self):
+        """
+        Current serving snapshot, after a cheap check for a newer version.
+        
+        Scoring methods read the model and score table from one snapshot so
+        a concurrent swap can never mix two versions in one call.
+        """
+        self.warm_up()
+        if self.follow_registry:
+            self._check_for_new_version()
+        return self.serving
+    
+    def _check_for_new_version(self):
+        """Start a background reload if the registry points at another version."""
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return
+        self._next_reload_check = now + self.RELOAD_CHECK_INTERVAL
+        
+        stamp = self.registry.pointer_stamp()
+        if stamp == self._pointer_stamp:
+            return
+        
+        version = self.registry.current_version()
+        if version is None or version == self.serving.version:
+            self._pointer_stamp = stamp
+            return
+        
+        # Only one reload at a time; requests keep using the old model meanwhile
+        if self._reload_lock.acquire(blocking=False):
+            threading.Thread(target=self._reload, args=(version, stamp), daemon=True).start()
+    
+    def _reload(self, version, stamp):
+        """
+        Load a registry version on the side, then swap it in.
+        
+        The pointer stamp is only recorded once the version is serving; if
+        loading fails the old model keeps serving and the next check retries.
+        """
+        try:
+            model_dir = self.registry.version_dir(version)
+            loader = LeadScoringAI(model_dir, version)
+            loader._initialize_model(train_if_missing=False)
+            
+            self._use_model_dir(model_dir, version)
+            self.model = loader.model
+            self.encoders = loader.encoders
+            self.score_table = loader.score_table
+            self.is_trained = loader.is_trained
+            self.serving = loader.serving
+            self._pointer_stamp = stamp
+            print(f"✅ AI Model {version} is now serving")
+        except Exception as e:
+            print(f"⚠️ Could not load AI Model {version}: {e}")
+        finally:
+            self._reload_lock.release()
+    
+    def publish_model(self, model, encoders=None):
+        """
+        Add a trained model to the registry and make it the current version.
+        
+        The compiled forest and score table are built before CURRENT is
+        swapped, so workers that pick up the new version only load files.
+        
+        Args:
+            model: Fitted RandomForestClassifier
+            encoders: Optional encoders saved alongside the model
+        
+        Returns:
+            str: The new version name
+        """
+        version = self.registry.create_version()
+        loader = LeadScoringAI(self.registry.version_dir(version), version)
+        loader.model = model
+        loader.encoders = encoders or {}
+        loader.is_trained = True
+        loader._save_model()
+        loader.warm_up()
+        
+        self.activate_version(version)
+        return version
+    
+    def activate_version(self, version):
+        """
+        Make a published version current (e.g. to roll back).
+        
+        Args:
+            version: Version name from the registry
+        """
+        self.registry.activate(version, MODEL_FILE)
+        # Let this process pick it up on its next scoring call
+        self._next_reload_check = 0
+    
+    def _initialize_model(self, train_if_missing=True):
+        """
+        Initialize or load the ML model.
+        
+        Args:
+            train_if_missing: Train (and save) the initial model when the model
+                file is missing or unreadable; registry versions pass False so
+                a broken version is never overwritten with the toy model
+        """
         if os.path.exists(self.model_path):
-            try:
-                with open(self.model_path, 'rb') as f:
-                    data = pickle.load(f)
-                    self.model = data['model']
-                    self.encoders = data['encoders']
-                    self.is_trained = True
-                    print("✅ AI Model loaded from file")
-            except:
-                self._train_initial_model()
-        else:
+            if self._load_compiled_forest():
+                print("✅ AI Model loaded from compiled forest")
+            else:
+                try:
+                    with open(self.model_path, 'rb') as f:
+                        data = pickle.load(f)
+                        self.model = data['model']
+                        self.encoders = data['encoders']
+                        self.is_trained = True
+                        print("✅ AI Model loaded from file")
+                except Exception:
+                    if not train_if_missing:
+                        raise
+                    self._train_initial_model()
+                else:
+                    self._export_forest()
+        elif train_if_missing:
             self._train_initial_model()
+        else:
+            raise FileNotFoundError(f'{MODEL_FILE} missing in {os.path.dirname(self.model_path)}')
+        
+        if self.version == BUNDLED_VERSION and os.path.exists(self.model_path):
+            # Name the bundled model after its contents, so shipping a new
+            # pickle makes every stored score stale
+            self.version = f'{BUNDLED_VERSION}-{self._model_digest()[:12]}'
+        
+        self.score_table = self._load_score_table()
+        self.serving = ServingModel(self.version, self.model if self.is_trained else None, self.score_table)
     
     def _train_initial_model(self):
         """Train the initial model with sample data."""
         print("🎯 Training initial AI model...")
+        from sklearn.ensemble import RandomForestClassifier
         
         # Create and train the model
         self.model = RandomForestClassifier(
@@ -93,11 +367,109 @@ class LeadScoringAI:
     
     def _save_model(self):
         """Save the trained model to file."""
-        with open(self.model_path, 'wb') as f:
-            pickle.dump({
-                'model': self.model,
-                'encoders': self.encoders
-            }, f)
+        atomic_write(self.model_path, lambda f: pickle.dump({
+            'model': self.model,
+            'encoders': self.encoders
+        }, f))
+        self._export_forest()
+    
+    def _export_forest(self):
+        """Export the sklearn model as a compiled forest for sklearn-free loading."""
+        try:
+            digest = self._model_digest()
+            atomic_write(self.forest_path, lambda f: export_forest(self.model, f, model_digest=digest))
+            print("✅ AI Model exported as compiled forest")
+        except OSError as e:
+            print(f"⚠️ Could not export compiled forest: {e}")
+    
+    def _load_compiled_forest(self):
+        """
+        Load the compiled forest if it was exported from the current model file.
+        
+        Serving only needs predict(), so this avoids importing sklearn and
+        unpickling the full estimator.
+        
+        Returns:
+            bool: True if the compiled forest is now the active model
+        """
+        try:
+            forest = CompiledForest.load(self.forest_path)
+        except (OSError, KeyError, ValueError):
+            return False
+        
+        if forest.metadata.get('model_digest') != self._model_digest():
+            return False
+        
+        self.model = forest
+        self.is_trained = True
+        return True
+    
+    def _score_table_shape(self):
+        """Size of each encoded feature's domain, in model input order."""
+        return (
+            len(set(self.SOURCE_MAP.values()) | {self.SOURCE_DEFAULT}),
+            len(set(self.SIZE_MAP.values()) | {self.SIZE_DEFAULT}),
+            self.ENGAGEMENT_LEVELS,
+            len(set(self.BUDGET_MAP.values()) | {self.BUDGET_DEFAULT}),
+            len(set(self.TIMELINE_MAP.values()) | {self.TIMELINE_DEFAULT})
+        )
+    
+    def _model_digest(self):
+        """SHA-256 of the saved model file, used to tie the score table to it."""
+        with open(self.model_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    
+    def _build_score_table(self, model):
+        """
+        Predict the final score for every point of the encoded feature grid.
+        
+        Args:
+            model: Model to predict with
+        
+        Returns:
+            numpy.ndarray: Scores indexed by (source, size, engagement, budget, timeline)
+        """
+        shape = self._score_table_shape()
+        grid = np.array(list(np.ndindex(*shape)), dtype=np.int64)
+        return self._predict_scores(model, grid).reshape(shape)
+    
+    def _load_score_table(self):
+        """
+        Load the precomputed score table, rebuilding it if the model changed.
+        
+        Returns:
+            numpy.ndarray: The score table, or None without a trained model
+        """
+        if not (self.is_trained and self.model is not None):
+            return None
+        
+        digest = self._model_digest()
+        try:
+            with np.load(self.score_table_path) as data:
+                if str(data['model_digest']) == digest and data['table'].shape == self._score_table_shape():
+                    return data['table']
+        except (OSError, KeyError, ValueError):
+            pass
+        
+        table = self._build_score_table(self.model)
+        try:
+            atomic_write(self.score_table_path, lambda f: np.savez(f, table=table, model_digest=digest))
+            print("✅ Score table precomputed and saved")
+        except OSError as e:
+            print(f"⚠️ Could not save score table: {e}")
+        return table
+    
+    def check_score_table(self):
+        """
+        Compare the precomputed score table against the live model.
+        
+        Returns:
+            int: Number of grid points where the table disagrees with the model
+        """
+        serving = self._serving_model()
+        if serving.score_table is None:
+            return 0
+        return int(np.count_nonzero(serving.score_table != self._build_score_table(serving.model)))
     
     def _encode_feature(self, feature, feature_name, categories):
         """Encode a categorical feature using simple mapping."""
@@ -115,10 +487,27 @@ class LeadScoringAI:
         
         Args:
             lead: Lead object with attributes
-            
+        
         Returns:
             int: Score between 0-100
         """
+        return self._score_lead(self._serving_model(), lead)
+    
+    def score_lead_with_version(self, lead):
+        """
+        Calculate AI score for a lead, with the version of the model used.
+        
+        Args:
+            lead: Lead object with attributes
+        
+        Returns:
+            tuple: (score between 0-100, model version)
+        """
+        serving = self._serving_model()
+        return self._score_lead(serving, lead), serving.version
+    
+    def _score_lead(self, serving, lead):
+        """Score one lead with the given serving snapshot."""
         # Extract features from lead
         features = {
             'source': lead.source,
@@ -132,30 +521,30 @@ class LeadScoringAI:
         encoded_features = []
         
         # Source encoding
-        source_map = {'website': 1, 'referral': 0, 'cold_call': 2, 'linkedin': 3, 'advertisement': 4, 'other': 5}
-        encoded_features.append(source_map.get(features['source'], 1))
+        encoded_features.append(self.SOURCE_MAP.get(features['source'], self.SOURCE_DEFAULT))
         
         # Company size encoding
-        size_map = {'small': 0, 'medium': 1, 'large': 2, 'enterprise': 3}
-        encoded_features.append(size_map.get(features['company_size'], 1))
+        encoded_features.append(self.SIZE_MAP.get(features['company_size'], self.SIZE_DEFAULT))
         
         # Engagement level (already numeric)
         encoded_features.append(int(features['engagement_level']))
         
         # Budget encoding
-        budget_map = {'unknown': 3, 'low': 0, 'medium': 1, 'high': 2, 'enterprise': 2}
-        encoded_features.append(budget_map.get(features['budget_range'], 3))
+        encoded_features.append(self.BUDGET_MAP.get(features['budget_range'], self.BUDGET_DEFAULT))
         
         # Timeline encoding
-        timeline_map = {'unknown': 2, 'long_term': 2, 'short_term': 1, 'immediate': 0}
-        encoded_features.append(timeline_map.get(features['timeline'], 2))
+        encoded_features.append(self.TIMELINE_MAP.get(features['timeline'], self.TIMELINE_DEFAULT))
+        
+        # Look the score up in the precomputed table when possible
+        if serving.score_table is not None and 0 <= encoded_features[2] < self.ENGAGEMENT_LEVELS:
+            return int(serving.score_table[tuple(encoded_features)])
         
         # Make prediction
         features_array = np.array([encoded_features])
         
-        if self.is_trained and self.model is not None:
+        if serving.model is not None:
             # Use ML model for prediction
-            predicted_score = self.model.predict(features_array)[0]
+            predicted_score = serving.model.predict(features_array)[0]
             # Add some variance based on engagement
             engagement_boost = (features['engagement_level'] - 1) * 2
             final_score = min(100, max(0, int(predicted_score + engagement_boost)))
@@ -165,71 +554,314 @@ class LeadScoringAI:
         
         return final_score
     
+    def score_leads(self, leads):
+        """
+        Calculate AI scores for many leads at once.
+        
+        Encodes whole feature columns with NumPy lookup tables and indexes
+        the precomputed score table, so the result matches calling
+        ``score_lead`` on every lead without any sklearn call. Engagement
+        levels outside the table fall back to chunked ``predict`` calls.
+        
+        Args:
+            leads: Iterable of Lead objects, or a dict of columns keyed by
+                feature name (source, company_size, engagement_level,
+                budget_range, timeline)
+        
+        Returns:
+            numpy.ndarray: Integer scores between 0-100, in input order
+        """
+        return self._score_leads(self._serving_model(), leads)
+    
+    def score_leads_with_version(self, leads):
+        """
+        Calculate AI scores for many leads, with the version of the model used.
+        
+        Args:
+            leads: Iterable of Lead objects, or a dict of feature columns
+        
+        Returns:
+            tuple: (numpy.ndarray of scores, model version)
+        """
+        serving = self._serving_model()
+        return self._score_leads(serving, leads), serving.version
+    
+    def _score_leads(self, serving, leads):
+        """Score many leads with the given serving snapshot."""
+        columns = self._collect_columns(leads)
+        engagement = np.asarray(columns['engagement_level'], dtype=np.int64)
+        count = len(engagement)
+        
+        if count == 0:
+            return np.zeros(0, dtype=np.int64)
+        
+        if serving.model is None:
+            return self._rule_based_scoring_many(columns, engagement)
+        
+        X = self._encode_features(columns, engagement)
+        
+        if serving.score_table is None:
+            return self._predict_scores(serving.model, X)
+        
+        in_table = (engagement >= 0) & (engagement < self.ENGAGEMENT_LEVELS)
+        if in_table.all():
+            return serving.score_table[tuple(X.T)]
+        
+        scores = np.empty(count, dtype=np.int64)
+        scores[in_table] = serving.score_table[tuple(X[in_table].T)]
+        scores[~in_table] = self._predict_scores(serving.model, X[~in_table])
+        return scores
+    
+    def encode_features(self, leads):
+        """
+        Encode leads into the model's feature matrix.
+        
+        Args:
+            leads: Iterable of Lead objects, or a dict of feature columns
+        
+        Returns:
+            numpy.ndarray: Encoded features (leads x 5), in model input order
+        """
+        columns = self._collect_columns(leads)
+        return self._encode_features(columns, np.asarray(columns['engagement_level'], dtype=np.int64))
+    
+    def _encode_features(self, columns, engagement):
+        """Build the encoded feature matrix column by column."""
+        X = np.empty((len(engagement), 5), dtype=np.int64)
+        X[:, 0] = self._encode_column(columns['source'], self.SOURCE_MAP, self.SOURCE_DEFAULT)
+        X[:, 1] = self._encode_column(columns['company_size'], self.SIZE_MAP, self.SIZE_DEFAULT)
+        X[:, 2] = engagement
+        X[:, 3] = self._encode_column(columns['budget_range'], self.BUDGET_MAP, self.BUDGET_DEFAULT)
+        X[:, 4] = self._encode_column(columns['timeline'], self.TIMELINE_MAP, self.TIMELINE_DEFAULT)
+        return X
+    
+    def _predict_scores(self, model, X):
+        """Run a model over an encoded feature matrix and apply the engagement boost."""
+        # Predict in bounded chunks to keep peak memory flat
+        predicted = np.empty(len(X), dtype=np.int64)
+        for start in range(0, len(X), self.SCORE_CHUNK_SIZE):
+            stop = start + self.SCORE_CHUNK_SIZE
+            predicted[start:stop] = model.predict(X[start:stop])
+        
+        # Same engagement boost and clamping as score_lead
+        engagement_boost = (X[:, 2] - 1) * 2
+        return np.clip(predicted + engagement_boost, 0, 100)
+    
+    def feature_fingerprint(self, lead):
+        """
+        Hash of the raw scoring features of one lead.
+        
+        Args:
+            lead: Lead object with attributes
+        
+        Returns:
+            str: 16 hex digit fingerprint
+        """
+        return self._fingerprint(getattr(lead, name) for name in self.FEATURE_COLUMNS)
+    
+    def feature_fingerprints(self, columns):
+        """Fingerprints for a dict of feature columns (see feature_fingerprint)."""
+        return [
+            self._fingerprint(values)
+            for values in zip(*(columns[name] for name in self.FEATURE_COLUMNS))
+        ]
+    
+    def _fingerprint(self, values):
+        """Stable (process independent) hash of a sequence of feature values."""
+        key = '\x1f'.join(str(value) for value in values)
+        return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    
+    def refresh_score(self, lead):
+        """
+        Re-score a lead only if its features or the model changed since it
+        was last scored, and stamp it with what the score was computed from.
+        
+        Args:
+            lead: Lead object with attributes
+        
+        Returns:
+            bool: True if the score was recomputed
+        """
+        serving = self._serving_model()
+        fingerprint = self.feature_fingerprint(lead)
+        if (lead.score_fingerprint == fingerprint
+                and lead.score_model_version == serving.version
+                and lead.ai_score is not None):
+            return False
+        
+        lead.ai_score = self._score_lead(serving, lead)
+        lead.score_fingerprint = fingerprint
+        lead.score_model_version = serving.version
+        return True
+    
+    def _collect_columns(self, leads):
+        """Turn leads (objects or a dict of columns) into feature columns."""
+        if isinstance(leads, dict):
+            return {name: leads[name] for name in self.FEATURE_COLUMNS}
+        
+        columns = {name: [] for name in self.FEATURE_COLUMNS}
+        for lead in leads:
+            for name in self.FEATURE_COLUMNS:
+                columns[name].append(getattr(lead, name))
+        return columns
+    
+    def _encode_column(self, values, mapping, default):
+        """Encode a categorical column through a NumPy lookup table."""
+        values = np.asarray(values, dtype=object)
+        if values.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        
+        # Factorize once, then map only the distinct values. None becomes
+        # 'None', which is not a category and falls back to the default.
+        uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+        table = np.array([mapping.get(value, default) for value in uniques], dtype=np.int64)
+        return table[inverse.ravel()]
+    
     def _rule_based_scoring(self, lead):
         """Fallback rule-based scoring if ML model is not available."""
         score = 0
         
         # Source scoring
-        source_scores = {
-            'referral': 25,
-            'linkedin': 20,
-            'website': 15,
-            'cold_call': 10,
-            'advertisement': 10,
-            'other': 5
-        }
-        score += source_scores.get(lead.source, 5)
+        score += self.RULE_SOURCE_SCORES.get(lead.source, 5)
         
         # Company size scoring
-        size_scores = {
-            'enterprise': 25,
-            'large': 20,
-            'medium': 15,
-            'small': 10
-        }
-        score += size_scores.get(lead.company_size, 10)
+        score += self.RULE_SIZE_SCORES.get(lead.company_size, 10)
         
         # Engagement scoring (max 25 points)
         score += (lead.engagement_level * 5)
         
         # Budget scoring
-        budget_scores = {
-            'high': 25,
-            'medium': 15,
-            'low': 10,
-            'unknown': 5
-        }
-        score += budget_scores.get(lead.budget_range, 5)
+        score += self.RULE_BUDGET_SCORES.get(lead.budget_range, 5)
         
         # Timeline scoring
-        timeline_scores = {
-            'immediate': 20,
-            'short_term': 15,
-            'long_term': 10,
-            'unknown': 5
-        }
-        score += timeline_scores.get(lead.timeline, 5)
+        score += self.RULE_TIMELINE_SCORES.get(lead.timeline, 5)
         
         return min(100, score)
     
-    def score_all_leads(self):
-        """Score all leads in the database."""
-        leads = Lead.query.all()
-        scored_count = 0
+    def _rule_based_scoring_many(self, columns, engagement):
+        """Vectorized version of _rule_based_scoring for feature columns."""
+        score = engagement * 5
+        score += self._encode_column(columns['source'], self.RULE_SOURCE_SCORES, 5)
+        score += self._encode_column(columns['company_size'], self.RULE_SIZE_SCORES, 10)
+        score += self._encode_column(columns['budget_range'], self.RULE_BUDGET_SCORES, 5)
+        score += self._encode_column(columns['timeline'], self.RULE_TIMELINE_SCORES, 5)
+        return np.minimum(100, score)
+    
+    def score_all_leads(self, batch_size=None, progress_callback=None):
+        """
+        Re-score every lead whose features or model version changed.
         
-        for lead in leads:
-            new_score = self.score_lead(lead)
-            if lead.ai_score != new_score:
-                lead.ai_score = new_score
-                scored_count += 1
+        Pages through the leads table by keyset on ``id``, reading only the
+        scoring columns and score stamps. Leads whose feature fingerprint and
+        model version still match their stamps are skipped; the rest are
+        scored with ``score_leads`` and written back (score and stamps) with
+        one executemany UPDATE per page. Each page is committed on its own,
+        so memory and transaction size stay flat regardless of table size.
+        
+        Args:
+            batch_size: Leads per page (defaults to RESCORE_BATCH_SIZE)
+            progress_callback: Optional callable(processed, changed) invoked
+                after each committed page
+        
+        Returns:
+            dict: Leads processed, re-scored (stale stamps) and changed (new score)
+        """
+        return self.rescore_leads(batch_size=batch_size, progress_callback=progress_callback)
+    
+    def rescore_leads(self, criterion=None, batch_size=None, progress_callback=None, commit=True):
+        """
+        Re-score the leads matching a filter whose features or model version changed.
+        
+        Works like ``score_all_leads`` on the matching leads only.
+        
+        Args:
+            criterion: SQL filter on Lead selecting the leads (None = all leads)
+            batch_size: Leads per page (defaults to RESCORE_BATCH_SIZE)
+            progress_callback: Optional callable(processed, changed) invoked
+                after each page
+            commit: Commit each page; pass False to leave every page in the
+                caller's transaction
+        
+        Returns:
+            dict: Leads processed, re-scored (stale stamps) and changed (new score)
+        """
+        batch_size = batch_size or self.RESCORE_BATCH_SIZE
+        # Every page is scored by the same model version
+        serving = self._serving_model()
+        leads_table = Lead.__table__
+        update_stmt = leads_table.update().where(
+            leads_table.c.id == bindparam('lead_id')
+        ).values(
+            ai_score=bindparam('new_score'),
+            score_fingerprint=bindparam('fingerprint'),
+            score_model_version=bindparam('model_version')
+        )
+        
+        last_id = 0
+        counts = {'processed': 0, 'rescored': 0, 'changed': 0}
+        
+        while True:
+            query = db.session.query(
+                Lead.id, Lead.source, Lead.company_size, Lead.engagement_level,
+                Lead.budget_range, Lead.timeline, Lead.ai_score,
+                Lead.score_fingerprint, Lead.score_model_version
+            ).filter(Lead.id > last_id)
+            if criterion is not None:
+                query = query.filter(criterion)
+            rows = query.order_by(Lead.id).limit(batch_size).all()
+            
+            if not rows:
+                break
+            
+            ids, source, company_size, engagement, budget, timeline, old_scores, old_fingerprints, old_versions = zip(*rows)
+            columns = {
+                'source': source,
+                'company_size': company_size,
+                'engagement_level': engagement,
+                'budget_range': budget,
+                'timeline': timeline
+            }
+            fingerprints = self.feature_fingerprints(columns)
+            
+            # Only score leads whose stamps no longer match
+            stale = [
+                i for i in range(len(rows))
+                if fingerprints[i] != old_fingerprints[i] or old_versions[i] != serving.version
+            ]
+            if stale:
+                new_scores = self._score_leads(serving, {
+                    name: [values[i] for i in stale] for name, values in columns.items()
+                }).tolist()
+                db.session.execute(update_stmt, [
+                    {
+                        'lead_id': ids[i],
+                        'new_score': new_score,
+                        'fingerprint': fingerprints[i],
+                        'model_version': serving.version
+                    }
+                    for i, new_score in zip(stale, new_scores)
+                ])
+                # Bulk UPDATEs bypass ORM events, so keep the stats counters in step
+                stale_old_scores = [old_scores[i] for i in stale]
+                adjust_lead_statistics(db.session.connection(), priority_deltas(stale_old_scores, new_scores))
+                counts['changed'] += sum(old != new for old, new in zip(stale_old_scores, new_scores))
+            if commit:
+                db.session.commit()
+            
+            last_id = ids[-1]
+            counts['processed'] += len(rows)
+            counts['rescored'] += len(stale)
+            
+            if progress_callback is not None:
+                progress_callback(counts['processed'], counts['changed'])
         
-        db.session.commit()
-        return scored_count
+        return counts
     
     def get_feature_importance(self):
         """Get feature importance from the model."""
-        if self.model is not None:
-            importance = self.model.feature_importances_
+        model = self._serving_model().model
+        if model is not None:
+            importance = model.feature_importances_
             feature_names = ['source', 'company_size', 'engagement', 'budget', 'timeline']
             return dict(zip(feature_names, importance))
         return None
@@ -0,0 +1,152 @@
+"""
+Compiled Forest Evaluator
+Serves RandomForestClassifier predictions from flat NumPy arrays, without sklearn
+"""
+import numpy as np
+
+# Marker sklearn uses for "no child" on leaf nodes
+LEAF = -1
+
+# Samples walked through the forest at once; bounds the node matrix size
+PREDICT_CHUNK_SIZE = 4096
+
+
+def export_forest(model, path, **metadata):
+    """
+    Flatten a fitted RandomForestClassifier into a compact .npz file.
+    
+    The node arrays of every tree are concatenated, with child indices
+    rebased so each tree's nodes stay addressable from its root. Leaves
+    point back at themselves, so a walk of max_depth steps always ends on a
+    leaf without branching on leaf-ness. Leaf values are stored already
+    normalized to class probabilities, exactly as each tree's predict_proba
+    computes them.
+    
+    Args:
+        model: Fitted RandomForestClassifier (single output)
+        path: Destination .npz path or binary file object
+        **metadata: Extra string values to store alongside the arrays
+    """
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count) + offset
+        is_leaf = tree.children_left == LEAF
+        
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        children.append(np.stack([
+            np.where(is_leaf, nodes, tree.children_left + offset),
+            np.where(is_leaf, nodes, tree.children_right + offset)
+        ], axis=1))
+        
+        proba = tree.value[:, 0, :].astype(np.float64)
+        normalizer = proba.sum(axis=1)
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(proba / normalizer[:, np.newaxis])
+        
+        roots.append(offset)
+        offset += tree.node_count
+    
+    np.savez_compressed(
+        path,
+        feature=np.concatenate(features).astype(np.int32),
+        threshold=np.concatenate(thresholds),
+        children=np.concatenate(children).astype(np.int32),
+        value=np.concatenate(values),
+        roots=np.array(roots, dtype=np.int32),
+        max_depth=np.int32(max(e.tree_.max_depth for e in model.estimators_)),
+        classes=model.classes_,
+        feature_importances=model.feature_importances_,
+        **{key: np.str_(value) for key, value in metadata.items()}
+    )
+
+
+class CompiledForest:
+    """Forest exported by export_forest, evaluated with NumPy only."""
+    
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.children = arrays['children']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.max_depth = int(arrays['max_depth'])
+        self.classes_ = arrays['classes']
+        self.feature_importances_ = arrays['feature_importances']
+        self.metadata = {
+            key: str(arrays[key]) for key in arrays
+            if arrays[key].dtype.kind == 'U'
+        }
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load a compiled forest from disk.
+        
+        Args:
+            path: Path written by export_forest
+        
+        Returns:
+            CompiledForest: The loaded forest
+        """
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files})
+    
+    def predict_proba(self, X):
+        """
+        Mean class probabilities over all trees.
+        
+        Duplicate rows are evaluated once. Within a chunk every sample walks
+        every tree at once: each step moves the whole (samples x trees) node
+        matrix one level down, so the number of NumPy operations depends on
+        the tree depth, not the input size.
+        
+        Args:
+            X: Encoded feature matrix (samples x features)
+        
+        Returns:
+            numpy.ndarray: Probabilities (samples x classes)
+        """
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) == 0:
+            return np.zeros((0, len(self.classes_)))
+        
+        unique_rows, inverse = np.unique(X, axis=0, return_inverse=True)
+        proba = np.empty((len(unique_rows), len(self.classes_)))
+        for start in range(0, len(unique_rows), PREDICT_CHUNK_SIZE):
+            stop = start + PREDICT_CHUNK_SIZE
+            proba[start:stop] = self._predict_proba_chunk(unique_rows[start:stop])
+        return proba[inverse.ravel()]
+    
+    def _predict_proba_chunk(self, X):
+        """Walk one chunk of distinct samples through every tree."""
+        # Offsets of each sample's row in the flattened input
+        flat = X.ravel()
+        row_offsets = (np.arange(len(X)) * X.shape[1])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        
+        for _ in range(self.max_depth):
+            go_right = flat[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[nodes, go_right.astype(np.intp)]
+        
+        # Accumulate tree by tree, in the same order sklearn does
+        proba = np.zeros((len(X), len(self.classes_)))
+        for tree in range(len(self.roots)):
+            proba += self.value[nodes[:, tree]]
+        return proba / len(self.roots)
+    
+    def predict(self, X):
+        """
+        Predict class labels, matching RandomForestClassifier.predict.
+        
+        Args:
+            X: Encoded feature matrix (samples x features)
+        
+        Returns:
+            numpy.ndarray: Predicted labels
+        """
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
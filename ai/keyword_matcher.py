@@ -0,0 +1,107 @@
+"""
+Keyword Matcher
+Finds the highest-priority category whose keywords occur in a message
+"""
+import re
+
+# Below this many keywords a substring search per keyword (in C, stopping at
+# the first hit in priority order) beats scanning the message with the
+# combined regex; see benchmarks/keyword_matching.py
+REGEX_MIN_KEYWORDS = 150
+
+
+class KeywordMatcher:
+    """
+    Substring keyword matching over many categories, compiled once.
+    
+    Gives the same answer as checking every keyword of every category with
+    `keyword in message` in category order, i.e. the first category (in the
+    order given) with any keyword anywhere in the message. Case-insensitive.
+    
+    Large keyword sets are compiled into a single trie-shaped regex, so one
+    scan of the message finds the longest keyword starting at each position
+    where any keyword starts. Every shorter keyword starting there is a
+    prefix of it, so each keyword carries the best category rank over its
+    prefixes and the answer is the best rank among the matches. Small sets
+    are searched keyword by keyword in priority order.
+    """
+    
+    def __init__(self, categories):
+        """
+        Compile the keywords.
+        
+        Args:
+            categories: (category, keywords) pairs, highest priority first
+        """
+        self.categories = []
+        ranks = {}
+        for category, keywords in categories:
+            rank = len(self.categories)
+            self.categories.append(category)
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword and keyword not in ranks:
+                    ranks[keyword] = rank
+        
+        # Rank of the best keyword that is a prefix of (or equal to) each keyword
+        self._ranks = {
+            keyword: min(ranks.get(keyword[:end], rank) for end in range(1, len(keyword) + 1))
+            for keyword, rank in ranks.items()
+        }
+        
+        # (keyword, category) in priority order, for the per-keyword search
+        self._keywords = tuple(
+            (keyword, self.categories[rank]) for keyword, rank in sorted(ranks.items(), key=lambda item: item[1])
+        )
+        
+        self._pattern = None
+        if len(ranks) >= REGEX_MIN_KEYWORDS:
+            trie = {}
+            for keyword in ranks:
+                node = trie
+                for char in keyword:
+                    node = node.setdefault(char, {})
+                node[''] = True
+            self._pattern = re.compile(_trie_pattern(trie))
+    
+    def match(self, message):
+        """
+        Find the best category for a message.
+        
+        Args:
+            message: User message
+        
+        Returns:
+            str: Highest-priority matching category, or None if none matches
+        """
+        message = message.lower()
+        if self._pattern is None:
+            for keyword, category in self._keywords:
+                if keyword in message:
+                    return category
+            return None
+        
+        best = None
+        search = self._pattern.search
+        found = search(message)
+        while found is not None:
+            rank = self._ranks[found.group()]
+            if best is None or rank < best:
+                best = rank
+                if best == 0:
+                    break
+            # Matches may overlap, so resume one character after this one
+            found = search(message, found.start() + 1)
+        return None if best is None else self.categories[best]
+
+
+def _trie_pattern(node):
+    """Regex for a trie node: branches on the next character, longest match first."""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    if len(branches) == 1 and '' not in node:
+        return branches[0]
+    alternation = f"(?:{'|'.join(branches)})"
+    # A keyword ends here: the longer keywords are tried first (greedy ?)
+    return alternation + '?' if '' in node else alternation
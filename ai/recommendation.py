@@ -2,9 +2,11 @@
 AI Recommendation System
 Generates action recommendations based on lead scores and characteristics
 """
+from types import SimpleNamespace
+import numpy as np
 from database.models import Lead, Notification
 from database.db_instance import db
-from datetime import datetime, timedelta
+from database.statistics import get_lead_statistics
 
 class RecommendationEngine:
     """AI-powered recommendation system for sales actions."""
@@ -12,6 +14,7 @@ class RecommendationEngine:
     # Score thresholds
     HIGH_SCORE_THRESHOLD = 70
     MEDIUM_SCORE_THRESHOLD = 40
+    LOW_SCORE_THRESHOLD = 25
     
     # Action templates
     ACTIONS = {
@@ -53,8 +56,33 @@ class RecommendationEngine:
         }
     }
     
+    # Discrete feature space the rules depend on. Each entry lists the
+    # representative values of one dimension; the last one stands for
+    # "anything else". Rules are compiled over this space at startup, so a
+    # new rule condition must only distinguish values listed here.
+    ENGAGEMENT_LEVELS = (0, 1, 2, 3, 4, 5)
+    TIMELINE_VALUES = ('immediate', 'short_term', 'other')
+    SOURCE_VALUES = ('referral', 'other')
+    BUDGET_VALUES = ('high', 'other')  # 'enterprise' budgets encode as 'high'
+    COMPANY_SIZE_VALUES = ('enterprise', 'other')
+    STATUS_VALUES = ('new', 'qualified', 'other')
+    
+    # Lead statuses that still need a recommended action
+    PENDING_STATUSES = ('new', 'qualified')
+    
+    # Lead attributes the rules read
+    FEATURE_COLUMNS = (
+        'ai_score', 'engagement_level', 'timeline', 'source',
+        'budget_range', 'company_size', 'status'
+    )
+    
     def __init__(self):
         self.rules = self._initialize_rules()
+        self.action_keys = list(self.ACTIONS)
+        self.score_edges = np.array(
+            [self.LOW_SCORE_THRESHOLD, self.MEDIUM_SCORE_THRESHOLD, self.HIGH_SCORE_THRESHOLD]
+        )
+        self.decision_table = self._compile_rules()
     
     def _initialize_rules(self):
         """Initialize recommendation rules."""
@@ -99,14 +127,14 @@ class RecommendationEngine:
             {
                 'condition': lambda lead: (
                     lead.ai_score < self.MEDIUM_SCORE_THRESHOLD and
-                    lead.ai_score >= 25 and
+                    lead.ai_score >= self.LOW_SCORE_THRESHOLD and
                     lead.source == 'referral'
                 ),
                 'action_key': 'follow_up_email'
             },
             {
                 'condition': lambda lead: (
-                    lead.ai_score < 25 and
+                    lead.ai_score < self.LOW_SCORE_THRESHOLD and
                     lead.engagement_level <= 2
                 ),
                 'action_key': 'reconnect'
@@ -134,33 +162,137 @@ class RecommendationEngine:
             }
         ]
     
-    def get_recommendation(self, lead):
+    def _compile_rules(self):
         """
-        Get recommended action for a lead.
+        Evaluate the rules once for every point of the discrete feature space.
         
-        Args:
-            lead: Lead object
-            
         Returns:
-            dict: Recommendation with action, priority, and description
+            numpy.ndarray: Outcome codes indexed by encoded features
+            (score bucket, engagement, timeline, source, budget, company size,
+            status). Code ``i`` is ``action_keys[i]`` matched by a rule; codes
+            offset by ``len(action_keys)`` are score-based defaults.
         """
-        # Try to find a matching rule
+        score_values = [int(self.score_edges[0]) - 1] + self.score_edges.tolist()
+        dimensions = (
+            score_values,
+            self.ENGAGEMENT_LEVELS,
+            self.TIMELINE_VALUES,
+            self.SOURCE_VALUES,
+            self.BUDGET_VALUES,
+            self.COMPANY_SIZE_VALUES,
+            self.STATUS_VALUES
+        )
+        table = np.empty([len(values) for values in dimensions], dtype=np.int8)
+        
+        for index in np.ndindex(*table.shape):
+            score, engagement, timeline, source, budget, company_size, status = (
+                values[i] for values, i in zip(dimensions, index)
+            )
+            lead = SimpleNamespace(
+                ai_score=score,
+                engagement_level=engagement,
+                timeline=timeline,
+                source=source,
+                budget_range=budget,
+                company_size=company_size,
+                status=status
+            )
+            table[index] = self._evaluate_rules(lead)
+        
+        return table
+    
+    def _evaluate_rules(self, lead):
+        """Walk the rule list for one lead and return its outcome code."""
         for rule in self.rules:
             if rule['condition'](lead):
-                action_key = rule['action_key']
-                recommendation = self.ACTIONS[action_key].copy()
-                recommendation['reason'] = self._get_reason(lead, action_key)
-                return recommendation
+                return self.action_keys.index(rule['action_key'])
         
         # Default action based on score
         if lead.ai_score >= self.HIGH_SCORE_THRESHOLD:
-            recommendation = self.ACTIONS['call_immediately'].copy()
+            action_key = 'call_immediately'
         elif lead.ai_score >= self.MEDIUM_SCORE_THRESHOLD:
-            recommendation = self.ACTIONS['follow_up_email'].copy()
+            action_key = 'follow_up_email'
         else:
-            recommendation = self.ACTIONS['nurture_campaign'].copy()
+            action_key = 'nurture_campaign'
+        return len(self.action_keys) + self.action_keys.index(action_key)
+    
+    def _encode_columns(self, columns):
+        """Encode feature columns into decision-table indices."""
+        def category(values, choices, aliases=()):
+            # Index of the value in choices; unmatched values map to the last slot
+            values = np.asarray(values, dtype=object)
+            codes = np.full(values.shape, len(choices) - 1, dtype=np.intp)
+            for code, choice in enumerate(choices[:-1]):
+                codes[values == choice] = code
+            for alias, choice in aliases:
+                codes[values == alias] = choices.index(choice)
+            return codes
         
-        recommendation['reason'] = 'Default recommendation based on score'
+        return (
+            np.searchsorted(self.score_edges, np.asarray(columns['ai_score'], dtype=np.int64), side='right'),
+            np.clip(np.asarray(columns['engagement_level'], dtype=np.int64), 0, len(self.ENGAGEMENT_LEVELS) - 1),
+            category(columns['timeline'], self.TIMELINE_VALUES),
+            category(columns['source'], self.SOURCE_VALUES),
+            category(columns['budget_range'], self.BUDGET_VALUES, aliases=[('enterprise', 'high')]),
+            category(columns['company_size'], self.COMPANY_SIZE_VALUES),
+            category(columns['status'], self.STATUS_VALUES)
+        )
+    
+    def recommend_many(self, columns):
+        """
+        Look up outcome codes for many leads with a single table index.
+        
+        Args:
+            columns: Dict of equal-length sequences keyed by ai_score,
+                engagement_level, timeline, source, budget_range,
+                company_size and status
+            
+        Returns:
+            numpy.ndarray: Outcome codes; decode with ``decode_outcome``
+        """
+        return self.decision_table[self._encode_columns(columns)]
+    
+    def decode_outcome(self, code):
+        """
+        Split an outcome code into its action key and default flag.
+        
+        Returns:
+            tuple: (action_key, is_default)
+        """
+        code = int(code)
+        is_default = code >= len(self.action_keys)
+        return self.action_keys[code % len(self.action_keys)], is_default
+    
+    def get_recommendation(self, lead):
+        """
+        Get recommended action for a lead.
+        
+        Args:
+            lead: Lead object
+            
+        Returns:
+            dict: Recommendation with action, priority, and description
+        """
+        code = self.recommend_many({
+            'ai_score': [lead.ai_score],
+            'engagement_level': [lead.engagement_level],
+            'timeline': [lead.timeline],
+            'source': [lead.source],
+            'budget_range': [lead.budget_range],
+            'company_size': [lead.company_size],
+            'status': [lead.status]
+        })[0]
+        return self._build_recommendation(lead, code)
+    
+    def _build_recommendation(self, lead, code):
+        """Build the recommendation dict for a lead from its outcome code."""
+        action_key, is_default = self.decode_outcome(code)
+        recommendation = self.ACTIONS[action_key].copy()
+        
+        if is_default:
+            recommendation['reason'] = 'Default recommendation based on score'
+        else:
+            recommendation['reason'] = self._get_reason(lead, action_key)
         return recommendation
     
     def _get_reason(self, lead, action_key):
@@ -194,9 +326,10 @@ class RecommendationEngine:
                 lead_id=lead.id,
                 title=f"Action Required: {lead.name}",
                 message=f"{recommendation['icon']} {recommendation['action']} - {recommendation['description']}",
-                notification_type='alert',
+                type='alert',
                 priority='high',
-                action_date=datetime.utcnow().date() + timedelta(days=1)
+                action_required=True,
+                action_url=f'/leads/view/{lead.id}'
             )
             db.session.add(notification)
         
@@ -205,15 +338,61 @@ class RecommendationEngine:
     def get_bulk_recommendations(self):
         """Get recommendations for all leads that need attention."""
         leads = Lead.query.filter(
-            Lead.status.in_(['new', 'qualified'])
+            Lead.status.in_(self.PENDING_STATUSES)
         ).all()
         
+        return self._recommend_leads(leads)
+    
+    def count_pending(self):
+        """
+        Count leads that need attention, without evaluating any of them.
+        
+        Returns:
+            int: Number of leads whose status is in PENDING_STATUSES
+        """
+        status_counts = get_lead_statistics().status_counts
+        return sum(status_counts.get(status, 0) for status in self.PENDING_STATUSES)
+    
+    def get_recommendations_page(self, after_id=0, limit=50):
+        """
+        Get one page of recommendations for leads that need attention.
+        
+        Pages are keyed on lead id, so only the leads being returned are
+        loaded and evaluated.
+        
+        Args:
+            after_id: Cursor from the previous page (0 for the first page)
+            limit: Maximum number of recommendations to return
+            
+        Returns:
+            dict: 'items' (lead + recommendation pairs) and 'next_cursor'
+            (None when there are no more pages)
+        """
+        leads = Lead.query.filter(
+            Lead.status.in_(self.PENDING_STATUSES),
+            Lead.id > after_id
+        ).order_by(Lead.id).limit(limit + 1).all()
+        
+        has_more = len(leads) > limit
+        leads = leads[:limit]
+        
+        return {
+            'items': self._recommend_leads(leads),
+            'next_cursor': leads[-1].id if has_more else None
+        }
+    
+    def _recommend_leads(self, leads):
+        """Build lead + recommendation pairs for a list of leads."""
+        codes = self.recommend_many({
+            name: [getattr(lead, name) for lead in leads]
+            for name in self.FEATURE_COLUMNS
+        })
+        
         recommendations = []
-        for lead in leads:
-            rec = self.get_recommendation(lead)
+        for lead, code in zip(leads, codes.tolist()):
             recommendations.append({
                 'lead': lead.to_dict(),
-                'recommendation': rec
+                'recommendation': self._build_recommendation(lead, code)
             })
         
         return recommendations
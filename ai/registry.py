@@ -0,0 +1,118 @@
+"""
+Model Registry
+Versioned model directories with an atomically swapped CURRENT pointer
+"""
+import os
+import re
+import tempfile
+
+# Name of the file holding the active version
+POINTER_FILE = 'CURRENT'
+
+# Version directories are named v1, v2, ...
+VERSION_PATTERN = re.compile(r'^v(\d+)$')
+
+
+def atomic_write(path, write):
+    """
+    Write a file via a temporary file and rename, so concurrent readers
+    (e.g. other worker processes) never see a partial file.
+
+    Args:
+        path: Destination path
+        write: Callable that writes the content to a binary file object
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ModelRegistry:
+    """
+    Directory of model versions, one subdirectory per version.
+
+    CURRENT names the active version. It is replaced atomically, so every
+    process sees either the old or the new version, never a partial write.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.pointer_path = os.path.join(root, POINTER_FILE)
+
+    def version_dir(self, version):
+        """Directory holding the files of one version."""
+        return os.path.join(self.root, version)
+
+    def versions(self):
+        """
+        List the published versions, oldest first.
+
+        Returns:
+            list: Version names
+        """
+        if not os.path.isdir(self.root):
+            return []
+        numbered = [
+            (int(match.group(1)), name)
+            for name in os.listdir(self.root)
+            for match in [VERSION_PATTERN.match(name)]
+            if match and os.path.isdir(self.version_dir(name))
+        ]
+        return [name for number, name in sorted(numbered)]
+
+    def current_version(self):
+        """
+        Read the active version.
+
+        Returns:
+            str: Version name, or None if nothing has been activated
+        """
+        try:
+            with open(self.pointer_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def pointer_stamp(self):
+        """Cheap change marker for the CURRENT pointer (a single stat call)."""
+        try:
+            stat = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def create_version(self):
+        """
+        Reserve the next version directory.
+
+        Returns:
+            str: The new version name
+        """
+        os.makedirs(self.root, exist_ok=True)
+        while True:
+            existing = self.versions()
+            number = int(existing[-1][1:]) + 1 if existing else 1
+            version = f'v{number}'
+            try:
+                os.mkdir(self.version_dir(version))
+                return version
+            except FileExistsError:
+                # Another publisher took this number; try the next one
+                continue
+
+    def activate(self, version, required_file):
+        """
+        Point CURRENT at a version.
+
+        Args:
+            version: Version name to activate
+            required_file: File name that must exist in the version directory
+        """
+        if not os.path.exists(os.path.join(self.version_dir(version), required_file)):
+            raise ValueError(f'Unknown model version: {version}')
+        atomic_write(self.pointer_path, lambda f: f.write(version.encode()))
@@ -0,0 +1,274 @@
+"""
+Knowledge Base Retrieval
+TF-IDF index over the chatbot knowledge bases, for questions no keyword matches
+"""
+import hashlib
+import json
+import os
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+from ai.registry import atomic_write
+
+# Serialized indexes live next to the database
+INDEX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+# Bump to rebuild every serialized index (e.g. after changing VECTORIZER_PARAMS)
+INDEX_FORMAT = 2
+
+# Character 3-5-grams within words, so "phoning", "rated" and typos still
+# meet "phone", "rating" and the correct spelling; sublinear tf keeps long
+# responses from drowning out the keywords. Only build() uses sklearn;
+# questions are vectorized by char_wb_ngrams with the saved idf weights.
+VECTORIZER_PARAMS = {
+    'analyzer': 'char_wb',
+    'ngram_range': (3, 5),
+    'sublinear_tf': True,
+}
+
+# Below this cosine similarity a question is treated as unrelated (unrelated
+# questions score about 0.05-0.08 against the knowledge bases)
+MIN_SIMILARITY = 0.1
+
+# Distinct normalized questions remembered per index
+CACHE_SIZE = 1024
+
+# Best matches returned per question
+TOP_K = 3
+
+
+def char_wb_ngrams(text, ngram_range):
+    """
+    Character n-grams inside word boundaries, as sklearn's char_wb analyzer makes them.
+    
+    Each whitespace-separated word is padded with one space on each side;
+    a word shorter than an n-gram length yields itself (padded) once.
+    
+    Args:
+        text: Lowercased text
+        ngram_range: (min_n, max_n)
+    
+    Returns:
+        list: The n-grams, with repeats
+    """
+    min_n, max_n = ngram_range
+    ngrams = []
+    for word in text.split():
+        word = f' {word} '
+        for n in range(min_n, max_n + 1):
+            if len(word) <= n:
+                ngrams.append(word)
+                break
+            ngrams.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return ngrams
+
+
+class RetrievalIndex:
+    """
+    TF-IDF weights of every knowledge base entry, stored term-major.
+    
+    A question is vectorized with the same vocabulary and idf weights, so
+    its cosine similarity to every entry is a single sparse matrix-vector
+    product, and the best entries are picked with argpartition. Results
+    are cached per normalized question. Serving needs numpy only.
+    """
+    
+    def __init__(self, keys, terms, idf, indptr, entries, weights, fingerprint,
+                 ngram_range=VECTORIZER_PARAMS['ngram_range']):
+        """
+        Args:
+            keys: Entry keys, in entry order
+            terms: Vocabulary, in column order
+            idf: Inverse document frequency per term
+            indptr, entries, weights: CSR arrays of the term x entry matrix
+                of L2-normalized TF-IDF rows
+            fingerprint: Hash of the documents and settings (see fingerprint)
+            ngram_range: Analyzer n-gram lengths
+        """
+        self.keys = list(keys)
+        self.terms = list(terms)
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.indptr = np.asarray(indptr)
+        self.entries = np.asarray(entries)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.fingerprint = fingerprint
+        self.ngram_range = tuple(int(n) for n in ngram_range)
+        self._vocabulary = {term: column for column, term in enumerate(self.terms)}
+        self._search = lru_cache(maxsize=CACHE_SIZE)(self._search_uncached)
+    
+    @classmethod
+    def build(cls, documents):
+        """
+        Fit the vocabulary, idf weights and matrix (needs sklearn).
+        
+        Args:
+            documents: (key, text) pairs, one per knowledge base entry
+        
+        Returns:
+            RetrievalIndex: The new index
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
+        vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS)
+        by_term = vectorizer.fit_transform([text for _, text in documents]).T.tocsr()
+        return cls(
+            [key for key, _ in documents], vectorizer.get_feature_names_out(), vectorizer.idf_,
+            by_term.indptr, by_term.indices, by_term.data, fingerprint(documents)
+        )
+    
+    def save(self, path):
+        """
+        Write the index to an .npz file (atomically, for concurrent workers).
+        
+        Args:
+            path: Destination path
+        """
+        atomic_write(path, lambda f: np.savez_compressed(
+            f,
+            keys=np.array(self.keys, dtype=np.str_),
+            terms=np.array(self.terms, dtype=np.str_),
+            idf=self.idf,
+            indptr=self.indptr,
+            entries=self.entries,
+            weights=self.weights,
+            ngram_range=np.array(self.ngram_range),
+            fingerprint=np.str_(self.fingerprint)
+        ))
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index written by save; costs no more than reading the arrays.
+        
+        Args:
+            path: Path written by save
+        
+        Returns:
+            RetrievalIndex: The loaded index
+        """
+        with np.load(path) as data:
+            return cls(
+                data['keys'].tolist(), data['terms'].tolist(), data['idf'],
+                data['indptr'], data['entries'], data['weights'],
+                str(data['fingerprint']), data['ngram_range'].tolist()
+            )
+    
+    def search(self, message, k=TOP_K):
+        """
+        Find the knowledge base entries most similar to a message.
+        
+        Args:
+            message: User message
+            k: Maximum entries to return
+        
+        Returns:
+            list: (key, cosine similarity) pairs, best first, similarity > 0
+        """
+        return list(self._search(' '.join(message.lower().split()), k))
+    
+    def best_match(self, message, min_similarity=MIN_SIMILARITY):
+        """
+        The single most similar entry, if it is similar enough.
+        
+        Args:
+            message: User message
+            min_similarity: Lowest cosine similarity that counts as a match
+        
+        Returns:
+            str: Key of the entry, or None
+        """
+        matches = self.search(message, k=1)
+        if matches and matches[0][1] >= min_similarity:
+            return matches[0][0]
+        return None
+    
+    def vectorize(self, message):
+        """
+        TF-IDF vector of a lowercased message, as TfidfVectorizer.transform computes it.
+        
+        Returns:
+            tuple: (columns, weights) of the L2-normalized sparse vector
+        """
+        counts = Counter(
+            column for column in map(self._vocabulary.get, char_wb_ngrams(message, self.ngram_range))
+            if column is not None
+        )
+        columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+        weights *= self.idf[columns]
+        norm = np.sqrt(np.dot(weights, weights))
+        if norm > 0:
+            weights /= norm
+        return columns, weights
+    
+    def similarities(self, message):
+        """
+        Cosine similarity of a lowercased message to every entry.
+        
+        The sparse matrix-vector product done on the term-major CSR arrays:
+        the rows of the message's terms are gathered and summed per entry
+        with bincount.
+        
+        Returns:
+            numpy.ndarray: One similarity per entry, in key order
+        """
+        columns, weights = self.vectorize(message)
+        starts = self.indptr[columns]
+        lengths = self.indptr[columns + 1] - starts
+        # Positions of every stored value in the gathered rows
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.bincount(
+            self.entries[offsets],
+            weights=self.weights[offsets] * np.repeat(weights, lengths),
+            minlength=len(self.keys)
+        )
+    
+    def _search_uncached(self, message, k):
+        scores = self.similarities(message)
+        if k < len(scores):
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return tuple((self.keys[i], float(scores[i])) for i in top if scores[i] > 0)
+    
+    def cache_info(self):
+        """Hit/miss statistics of the question cache."""
+        return self._search.cache_info()
+
+
+def fingerprint(documents):
+    """Hash of the documents and index settings; a saved index is reused only if it matches."""
+    payload = json.dumps([INDEX_FORMAT, VECTORIZER_PARAMS, list(documents)], default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_index(name, documents, index_dir=INDEX_DIR):
+    """
+    Load a serialized index, or build and save it if missing or out of date.
+    
+    Args:
+        name: Index name (the file is <index_dir>/<name>_index.npz)
+        documents: (key, text) pairs, one per knowledge base entry
+        index_dir: Directory holding the serialized indexes
+    
+    Returns:
+        RetrievalIndex: Index over the documents
+    """
+    path = os.path.join(index_dir, f'{name}_index.npz')
+    expected = fingerprint(documents)
+    
+    if os.path.exists(path):
+        try:
+            index = RetrievalIndex.load(path)
+            if index.fingerprint == expected:
+                return index
+        except Exception as e:
+            print(f"⚠️ Could not load {path}, rebuilding: {e}")
+    
+    index = RetrievalIndex.build(documents)
+    try:
+        index.save(path)
+    except OSError as e:
+        print(f"⚠️ Could not save {path}: {e}")
+    return index
@@ -0,0 +1,255 @@
+"""
+Lead Scoring Training Pipeline
+Trains the scoring forest on converted/lost outcomes from the leads table
+"""
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sqlalchemy import select
+from database.models import Lead
+from ai import lead_scorer
+from ai.registry import atomic_write
+
+# Lead statuses that carry a final outcome
+OUTCOME_STATUSES = ('converted', 'lost')
+
+# Leads read (and encoded) per query while streaming the history
+CHUNK_SIZE = 50000
+
+# Share of the labeled leads held out for the report's accuracy figures
+HOLDOUT_FRACTION = 0.2
+
+# The hyperparameter search fits on at most this many training rows
+SEARCH_SAMPLE_SIZE = 200000
+
+# Pseudo-observations of the overall conversion rate added to every
+# feature combination, so rare combinations do not get extreme labels
+PRIOR_WEIGHT = 20
+
+# Score labels are multiples of this step (keeps the class count small)
+SCORE_STEP = 5
+
+# Scores at or above this count as a predicted conversion for accuracy
+DECISION_THRESHOLD = 50
+
+RANDOM_STATE = 42
+
+PARAM_GRID = [
+    {'n_estimators': 100, 'max_depth': max_depth, 'min_samples_leaf': min_samples_leaf}
+    for max_depth in (6, 8, 10)
+    for min_samples_leaf in (1, 50)
+]
+
+
+def load_training_data(connection, chunk_size=CHUNK_SIZE):
+    """
+    Stream converted/lost leads out of the leads table.
+    
+    Runs one streaming query and encodes each chunk of rows as it arrives,
+    so only the compact feature matrix is kept in memory.
+    
+    Args:
+        connection: SQLAlchemy connection to read from
+        chunk_size: Rows fetched and encoded at a time
+    
+    Returns:
+        tuple: (encoded features, converted flags, stored ai_score with NaN
+            for missing scores)
+    """
+    table = Lead.__table__
+    query = select(
+        table.c.source, table.c.company_size, table.c.engagement_level,
+        table.c.budget_range, table.c.timeline, table.c.status, table.c.ai_score
+    ).where(
+        table.c.status.in_(OUTCOME_STATUSES),
+        table.c.engagement_level.isnot(None)
+    )
+    result = connection.execution_options(stream_results=True).execute(query)
+    
+    features, outcomes, scores = [], [], []
+    for rows in result.partitions(chunk_size):
+        source, company_size, engagement, budget, timeline, status, ai_score = zip(*rows)
+        features.append(lead_scorer.encode_features({
+            'source': source,
+            'company_size': company_size,
+            'engagement_level': engagement,
+            'budget_range': budget,
+            'timeline': timeline
+        }).astype(np.int8))
+        outcomes.append(np.array(status, dtype=object) == 'converted')
+        scores.append(np.array(ai_score, dtype=np.float64))
+    
+    if not features:
+        return np.zeros((0, 5), dtype=np.int8), np.zeros(0, dtype=bool), np.zeros(0)
+    return np.concatenate(features), np.concatenate(outcomes), np.concatenate(scores)
+
+
+def outcome_labels(X, converted):
+    """
+    Score labels learned from outcomes.
+    
+    Each row is labeled with the smoothed conversion rate of its feature
+    combination, as a 0-100 score snapped to SCORE_STEP. The engagement
+    boost the scorer adds at prediction time is subtracted first, so final
+    scores track the observed conversion rate.
+    
+    Args:
+        X: Encoded features
+        converted: Boolean outcome per row
+    
+    Returns:
+        numpy.ndarray: Integer score label per row
+    """
+    combinations, inverse = np.unique(X, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    wins = np.bincount(inverse, weights=converted, minlength=len(combinations))
+    totals = np.bincount(inverse, minlength=len(combinations))
+    
+    prior = converted.mean()
+    rate = (wins + PRIOR_WEIGHT * prior) / (totals + PRIOR_WEIGHT)
+    target = rate * 100 - (combinations[:, 2].astype(np.int64) - 1) * 2
+    labels = np.clip(np.round(target / SCORE_STEP) * SCORE_STEP, 0, 100).astype(np.int64)
+    return labels[inverse]
+
+
+def evaluate_scores(scores, converted):
+    """
+    Accuracy figures for scores against actual outcomes.
+    
+    Args:
+        scores: Scores between 0-100
+        converted: Boolean outcome per score
+    
+    Returns:
+        dict: ROC AUC and accuracy at DECISION_THRESHOLD
+    """
+    from sklearn.metrics import roc_auc_score
+    
+    if len(scores) == 0:
+        return {'roc_auc': None, 'accuracy': None}
+    return {
+        # AUC is undefined when every lead has the same outcome
+        'roc_auc': float(roc_auc_score(converted, scores)) if len(np.unique(converted)) == 2 else None,
+        'accuracy': float(np.mean((scores >= DECISION_THRESHOLD) == converted))
+    }
+
+
+def _fit_candidate(params, X_train, y_train, X_val, converted_val):
+    """Fit one search candidate single-threaded and score it (runs in a worker process)."""
+    from sklearn.ensemble import RandomForestClassifier
+    
+    start = time.perf_counter()
+    model = RandomForestClassifier(random_state=RANDOM_STATE, n_jobs=1, **params)
+    model.fit(X_train, y_train)
+    metrics = evaluate_scores(lead_scorer._predict_scores(model, X_val), converted_val)
+    return {'params': params, 'seconds': time.perf_counter() - start, **metrics}
+
+
+def search_parameters(X, y, converted, workers=None):
+    """
+    Evaluate PARAM_GRID in parallel, one candidate per process.
+    
+    Args:
+        X: Encoded training features
+        y: Score labels
+        converted: Outcomes, used to rank candidates
+        workers: Process count (defaults to the CPU count)
+    
+    Returns:
+        list: Candidate results, best (highest ROC AUC) first
+    """
+    rng = np.random.default_rng(RANDOM_STATE)
+    if len(X) > SEARCH_SAMPLE_SIZE:
+        sample = rng.choice(len(X), SEARCH_SAMPLE_SIZE, replace=False)
+        X, y, converted = X[sample], y[sample], converted[sample]
+    
+    # Hold part of the sample out for ranking the candidates
+    order = rng.permutation(len(X))
+    cut = int(len(X) * (1 - HOLDOUT_FRACTION))
+    fit_rows, val_rows = order[:cut], order[cut:]
+    
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [
+            pool.submit(_fit_candidate, params, X[fit_rows], y[fit_rows], X[val_rows], converted[val_rows])
+            for params in PARAM_GRID
+        ]
+        results = [future.result() for future in futures]
+    
+    return sorted(results, key=lambda result: result['roc_auc'] or 0, reverse=True)
+
+
+def train_model(connection, output_path, n_jobs=-1, publish=False):
+    """
+    Run the full pipeline: load, label, search, fit, evaluate and save.
+    
+    Args:
+        connection: SQLAlchemy connection to the leads database
+        output_path: Where to write the model pickle; the report is written
+            next to it as <name>_report.json
+        n_jobs: Cores for the final fit (-1 = all)
+        publish: Also publish the model to the registry and make it current
+    
+    Returns:
+        dict: The training report
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    
+    timings = {}
+    started = time.perf_counter()
+    
+    start = time.perf_counter()
+    X, converted, old_scores = load_training_data(connection)
+    timings['load_seconds'] = time.perf_counter() - start
+    if len(X) == 0:
+        raise ValueError('No converted or lost leads to train on')
+    
+    # Split before labeling so holdout outcomes never leak into the labels
+    order = np.random.default_rng(RANDOM_STATE).permutation(len(X))
+    cut = int(len(X) * (1 - HOLDOUT_FRACTION))
+    train_rows, test_rows = order[:cut], order[cut:]
+    
+    start = time.perf_counter()
+    y_train = outcome_labels(X[train_rows], converted[train_rows])
+    timings['label_seconds'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    candidates = search_parameters(X[train_rows], y_train, converted[train_rows], workers=None if n_jobs == -1 else n_jobs)
+    timings['search_seconds'] = time.perf_counter() - start
+    best_params = candidates[0]['params']
+    
+    start = time.perf_counter()
+    model = RandomForestClassifier(random_state=RANDOM_STATE, n_jobs=n_jobs, **best_params)
+    model.fit(X[train_rows], y_train)
+    # Serving predicts a handful of rows at a time; don't spin up threads for it
+    model.set_params(n_jobs=None)
+    timings['fit_seconds'] = time.perf_counter() - start
+    
+    test_scores = lead_scorer._predict_scores(model, X[test_rows])
+    known = ~np.isnan(old_scores[test_rows])
+    
+    atomic_write(output_path, lambda f: pickle.dump({'model': model, 'encoders': {}}, f))
+    
+    report = {
+        'rows': int(len(X)),
+        'train_rows': int(len(train_rows)),
+        'test_rows': int(len(test_rows)),
+        'conversion_rate': float(converted.mean()),
+        'best_params': best_params,
+        'candidates': candidates,
+        'test': evaluate_scores(test_scores, converted[test_rows]),
+        'previous_scores_test': evaluate_scores(old_scores[test_rows][known], converted[test_rows][known]),
+        'timings': timings,
+        'model_path': output_path
+    }
+    
+    if publish:
+        report['model_version'] = lead_scorer.publish_model(model)
+    
+    timings['total_seconds'] = time.perf_counter() - started
+    report_path = os.path.splitext(output_path)[0] + '_report.json'
+    atomic_write(report_path, lambda f: f.write(json.dumps(report, indent=2).encode()))
+    report['report_path'] = report_path
+    return report
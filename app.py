@@ -2,6 +2,8 @@
 AI Sales Assistance Agent - Main Application
 Flask-based web application for sales team automation
 """
+import os
+import click
 from flask import Flask, session
 from database.db_instance import db
 from config import config
@@ -13,13 +15,19 @@ def create_app(config_name='development'):
     
     # Initialize extensions
     db.init_app(app)
+    from database.loading import init_query_budget
+    init_query_budget(app)
     
     with app.app_context():
         # Import models to register them with db
-        from database.models import Lead, Notification, User
+        from database.models import Lead, Notification, User, Job
         
-        # Create database tables
+        # Create database tables and upgrade older database files
         db.create_all()
+        from database.migrations import upgrade_database
+        upgraded = upgrade_database()
+        if upgraded:
+            print(f"✅ Database upgraded ({', '.join(upgraded)})")
         
         # Create default admin user if none exists
         if User.query.filter_by(username='admin').first() is None:
@@ -34,6 +42,10 @@ def create_app(config_name='development'):
             
             db.session.commit()
             print("✅ Default users created (admin/admin123, demo/demo123)")
+        
+        # Build the materialized stats counters on first run / older databases
+        from database.statistics import ensure_lead_statistics
+        ensure_lead_statistics()
     
     # Register blueprints
     from routes.auth import auth_bp
@@ -42,6 +54,7 @@ def create_app(config_name='development'):
     from routes.dashboard import dashboard_bp
     from routes.notifications import notifications_bp
     from routes.help_assistant import help_assistant_bp
+    from routes.jobs import jobs_bp
     
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(chatbot_bp, url_prefix='/chatbot')
@@ -49,6 +62,99 @@ def create_app(config_name='development'):
     app.register_blueprint(dashboard_bp, url_prefix='/')
     app.register_blueprint(notifications_bp, url_prefix='/notifications')
     app.register_blueprint(help_assistant_bp, url_prefix='/help')
+    app.register_blueprint(jobs_bp, url_prefix='/jobs')
+    
+    # Start the background job runner
+    from jobs import job_runner
+    job_runner.init_app(app)
+    
+    # Follow-up reminders; started by `flask followups` or the dev server below
+    from jobs.scheduler import followup_scheduler
+    followup_scheduler.init_app(app)
+    
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats():
+        """Recompute the materialized lead statistics from scratch."""
+        from database.statistics import rebuild_lead_statistics
+        stats = rebuild_lead_statistics()
+        print(f"✅ Lead statistics rebuilt: {stats.to_dict()}")
+    
+    @app.cli.command('followups')
+    @click.option('--once', is_flag=True, help='Emit the reminders that are due now and exit')
+    def followups(once):
+        """Emit follow-up reminders as leads fall due."""
+        if once:
+            result = followup_scheduler.run_once()
+            print(f"✅ {result['created_count']} follow-up reminders created, {result['scheduled']} upcoming")
+            return
+        followup_scheduler.start()
+        try:
+            followup_scheduler.join()
+        except KeyboardInterrupt:
+            followup_scheduler.stop()
+    
+    @app.cli.command('check-score-table')
+    def check_score_table():
+        """Verify the precomputed score table against the live model."""
+        from ai import lead_scorer
+        mismatches = lead_scorer.check_score_table()
+        if mismatches:
+            print(f"❌ Score table disagrees with the model at {mismatches} points")
+        else:
+            print("✅ Score table matches the model")
+    
+    @app.cli.command('list-models')
+    def list_models():
+        """List the model versions in the registry."""
+        from ai import lead_scorer
+        current = lead_scorer.registry.current_version()
+        for version in lead_scorer.registry.versions():
+            print(f"{'*' if version == current else ' '} {version}")
+        if current is None:
+            print("* bundled model (no registry version active)")
+    
+    @app.cli.command('publish-model')
+    @click.argument('model_file', type=click.Path(exists=True, dir_okay=False))
+    def publish_model(model_file):
+        """Publish a pickled model as a new version and make it current."""
+        import pickle
+        from ai import lead_scorer
+        with open(model_file, 'rb') as f:
+            data = pickle.load(f)
+        version = lead_scorer.publish_model(data['model'], data.get('encoders'))
+        print(f"✅ Model published as {version}; workers switch within seconds")
+    
+    @app.cli.command('train-model')
+    @click.option('--database', type=click.Path(exists=True, dir_okay=False),
+                  help='SQLite file to train from (defaults to the app database)')
+    @click.option('--output', type=click.Path(dir_okay=False),
+                  default=os.path.join('data', 'trained_model.pkl'), show_default=True,
+                  help='Where to write the model pickle (report goes next to it)')
+    @click.option('--jobs', default=-1, show_default=True, help='CPU cores to use (-1 = all)')
+    @click.option('--publish', is_flag=True, help='Publish the model to the registry and make it current')
+    def train_model(database, output, jobs, publish):
+        """Train the scoring model on converted/lost leads."""
+        from sqlalchemy import create_engine
+        from ai.training import train_model as run_training
+        engine = create_engine('sqlite:///' + os.path.abspath(database)) if database else db.engine
+        with engine.connect() as connection:
+            report = run_training(connection, output, n_jobs=jobs, publish=publish)
+        print(f"✅ Trained on {report['rows']} leads in {report['timings']['total_seconds']:.1f}s "
+              f"(test ROC AUC {report['test']['roc_auc']}, previous scores {report['previous_scores_test']['roc_auc']})")
+        if publish:
+            print(f"✅ Published as {report['model_version']}")
+        print(f"📄 Report: {report['report_path']}")
+    
+    @app.cli.command('activate-model')
+    @click.argument('version')
+    def activate_model(version):
+        """Switch the current model version (e.g. roll back)."""
+        from ai import lead_scorer
+        try:
+            lead_scorer.activate_version(version)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        print(f"✅ Model {version} is now current")
     
     # Redirect root to login or dashboard
     @app.route('/')
@@ -70,5 +176,9 @@ if __name__ == '__main__':
     print("Starting application...")
     print("Access the dashboard at: http://localhost:5000")
     print("=" * 60)
+    # Skip the reloader's parent process so only one scheduler runs
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from jobs.scheduler import followup_scheduler
+        followup_scheduler.start()
     app.run(debug=True)
 
@@ -0,0 +1,115 @@
+"""
+Keyword Matching Benchmark
+Compares the original per-keyword loop with both KeywordMatcher strategies
+(per-keyword search and combined regex) on the chatbot knowledge bases and
+on synthetic keyword sets of growing size
+
+Usage: python -m benchmarks.keyword_matching
+"""
+import random
+import string
+import time
+from ai import keyword_matcher
+from ai.keyword_matcher import KeywordMatcher
+from routes.chatbot import CHATBOT_RESPONSES
+from routes.help_assistant import HELP_RESPONSES
+
+# Words used to pad messages around (or instead of) keywords
+FILLER = ['the', 'lead', 'please', 'tell', 'me', 'about', 'my', 'pipeline', 'today', 'thanks',
+          'could', 'you', 'show', 'quarter', 'customer', 'deal', 'team', 'weekly', 'numbers']
+
+
+def loop_match(categories, message):
+    """The original matcher: every keyword of every category, in order."""
+    message = message.lower()
+    for category, keywords in categories:
+        for keyword in keywords:
+            if keyword.lower() in message:
+                return category
+    return None
+
+
+def synthetic_categories(num_categories, keywords_per_category, rng):
+    """Random lowercase keywords (1-3 words) spread over categories."""
+    def word():
+        return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+    return [
+        (f'category_{i}', [' '.join(word() for _ in range(rng.randint(1, 3))) for _ in range(keywords_per_category)])
+        for i in range(num_categories)
+    ]
+
+
+def messages(categories, length, count, rng):
+    """Messages of about `length` words; half contain one keyword near the end, half none."""
+    keywords = [keyword for _, category_keywords in categories for keyword in category_keywords]
+    result = []
+    for i in range(count):
+        words = [rng.choice(FILLER) for _ in range(length)]
+        if i % 2 == 0:
+            words.insert(rng.randint(length * 3 // 4, length), rng.choice(keywords))
+        result.append(' '.join(words))
+    return result
+
+
+def build(categories, use_regex):
+    """KeywordMatcher forced onto one strategy, and its compile time in ms."""
+    threshold = keyword_matcher.REGEX_MIN_KEYWORDS
+    keyword_matcher.REGEX_MIN_KEYWORDS = 0 if use_regex else float('inf')
+    try:
+        start = time.perf_counter()
+        matcher = KeywordMatcher(categories)
+        return matcher, (time.perf_counter() - start) * 1000
+    finally:
+        keyword_matcher.REGEX_MIN_KEYWORDS = threshold
+
+
+def time_per_message(match, texts, repeat):
+    """Mean microseconds per call over all texts."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            match(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    chatbot = [(key, data['keywords']) for key, data in CHATBOT_RESPONSES.items() if key != 'default']
+    help_assistant = [(key, data['keywords']) for key, data in HELP_RESPONSES.items()]
+    
+    cases = [
+        ('chatbot', chatbot),
+        ('help', help_assistant),
+        ('10x10 keywords', synthetic_categories(10, 10, rng)),
+        ('20x10 keywords', synthetic_categories(20, 10, rng)),
+        ('40x10 keywords', synthetic_categories(40, 10, rng)),
+        ('100x50 keywords', synthetic_categories(100, 50, rng)),
+    ]
+    
+    print(f"{'':34} {'loop':>11} {'search':>11} {'regex':>11} {'regex compile':>14}")
+    all_match = True
+    for name, categories in cases:
+        regex, compile_ms = build(categories, use_regex=True)
+        search, _ = build(categories, use_regex=False)
+        num_keywords = len(search._keywords)
+        for length in (10, 2000):
+            texts = messages(categories, length, 50, rng)
+            repeat = max(1, 2000 // length)
+            expected = [loop_match(categories, text) for text in texts]
+            all_match &= [regex.match(text) for text in texts] == expected
+            all_match &= [search.match(text) for text in texts] == expected
+            
+            timings = [
+                time_per_message(lambda text: loop_match(categories, text), texts, repeat),
+                time_per_message(search.match, texts, repeat),
+                time_per_message(regex.match, texts, repeat)
+            ]
+            label = f"{name} ({num_keywords}), {length} words"
+            print(f"{label:34} " + ' '.join(f"{us:8.1f} us" for us in timings) + f" {compile_ms:11.1f} ms")
+    
+    print(f"KeywordMatcher uses the regex from {keyword_matcher.REGEX_MIN_KEYWORDS} keywords")
+    print("✅ Matches agree with the keyword loop" if all_match else "❌ Matches differ from the keyword loop")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Model Serving Benchmark
+Compares the pickled sklearn forest with the compiled NumPy forest:
+import + load time, worker RSS and predict throughput
+
+Usage: python -m benchmarks.model_serving
+"""
+import json
+import os
+import subprocess
+import sys
+
+AI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai')
+
+# Each snippet runs in a fresh interpreter so imports and RSS are isolated
+SETUP = '''
+import json, resource, time
+start = time.perf_counter()
+'''
+
+LOAD_SKLEARN = '''
+import pickle
+with open({model!r}, 'rb') as f:
+    model = pickle.load(f)['model']
+'''
+
+LOAD_COMPILED = '''
+import importlib.util
+spec = importlib.util.spec_from_file_location('forest', {forest_module!r})
+forest = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(forest)
+model = forest.CompiledForest.load({forest!r})
+'''
+
+MEASURE = '''
+load_seconds = time.perf_counter() - start
+import numpy as np
+X = np.random.RandomState(0).randint(0, 6, size=(100000, 5))
+start = time.perf_counter()
+labels = model.predict(X)
+predict_seconds = time.perf_counter() - start
+print(json.dumps({
+    'load_seconds': load_seconds,
+    'predict_seconds': predict_seconds,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'checksum': int(labels.sum())
+}))
+'''
+
+
+def run(loader):
+    """Run one measurement in a subprocess and return its results."""
+    code = SETUP + loader.format(
+        model=os.path.join(AI_DIR, 'lead_scoring_model.pkl'),
+        forest=os.path.join(AI_DIR, 'lead_scoring_forest.npz'),
+        forest_module=os.path.join(AI_DIR, 'forest.py')
+    ) + MEASURE
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    results = {
+        'sklearn pickle': run(LOAD_SKLEARN),
+        'compiled forest': run(LOAD_COMPILED)
+    }
+    
+    print(f"{'':16} {'import+load':>12} {'max RSS':>10} {'predict 100k':>13}")
+    for name, result in results.items():
+        print(f"{name:16} {result['load_seconds'] * 1000:9.0f} ms "
+              f"{result['max_rss_mb']:7.1f} MB {result['predict_seconds'] * 1000:10.0f} ms")
+    
+    checksums = {result['checksum'] for result in results.values()}
+    print("✅ Predictions match" if len(checksums) == 1 else "❌ Predictions differ")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Query Plan Benchmark
+Shows SQLite query plans and timings for the hot route queries,
+before and after the indexes from database.migrations are applied
+
+Usage: python -m benchmarks.query_plans [num_leads]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from flask import Flask
+from sqlalchemy import text
+from database.db_instance import db
+from database.models import Lead, Notification
+from database.migrations import upgrade_database
+
+# Hot queries issued by the routes, in plain SQL
+HOT_QUERIES = {
+    'leads listing (first page)':
+        "SELECT * FROM leads ORDER BY ai_score DESC, id LIMIT 51",
+    'leads listing by status':
+        "SELECT * FROM leads WHERE status = 'new' ORDER BY ai_score DESC, id LIMIT 51",
+    'leads listing by priority':
+        "SELECT * FROM leads WHERE ai_score >= 70 ORDER BY ai_score DESC, id LIMIT 51",
+    'recommendations page':
+        "SELECT * FROM leads WHERE status IN ('new', 'qualified') AND id > 0 ORDER BY id LIMIT 51",
+    'due follow-ups':
+        "SELECT id FROM leads WHERE status IN ('new', 'qualified') AND next_followup <= :today",
+    'recently added':
+        "SELECT * FROM leads ORDER BY created_at DESC LIMIT 5",
+    'unread notifications':
+        "SELECT * FROM notifications WHERE is_read = 0 AND id > 0 ORDER BY id DESC LIMIT 51",
+    'unread count':
+        "SELECT count(*) FROM (SELECT id FROM notifications WHERE is_read = 0 AND id > 0 LIMIT 999)",
+    'notifications inbox page':
+        "SELECT * FROM notifications WHERE id < 1000000 ORDER BY id DESC LIMIT 51",
+    'unread reminder for lead':
+        "SELECT id FROM notifications WHERE lead_id = 42 AND type = 'reminder' AND is_read = 0 LIMIT 1",
+}
+
+REPEATS = 5
+
+
+def create_app(path):
+    """Minimal app bound to a scratch SQLite file."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+    db.init_app(app)
+    return app
+
+
+def seed(num_leads):
+    """Bulk insert synthetic leads and notifications."""
+    rnd = random.Random(42)
+    now = datetime.utcnow()
+    
+    leads = [{
+        'name': f'Lead {i}',
+        'email': f'lead{i}@example.com',
+        'source': rnd.choice(['website', 'referral', 'cold_call', 'linkedin']),
+        'company_size': rnd.choice(['small', 'medium', 'large', 'enterprise']),
+        'engagement_level': rnd.randint(1, 5),
+        'status': rnd.choice(['new', 'qualified', 'converted', 'lost']),
+        'ai_score': rnd.randint(0, 100),
+        'created_at': now - timedelta(minutes=i),
+        'updated_at': now,
+        'next_followup': date.today() + timedelta(days=rnd.randint(-30, 30))
+    } for i in range(num_leads)]
+    db.session.execute(Lead.__table__.insert(), leads)
+    
+    notifications = [{
+        'lead_id': rnd.randint(1, num_leads),
+        'type': rnd.choice(['reminder', 'alert']),
+        'title': 'Follow up',
+        'is_read': rnd.random() < 0.9,
+        'created_at': now - timedelta(minutes=i)
+    } for i in range(num_leads)]
+    db.session.execute(Notification.__table__.insert(), notifications)
+    db.session.commit()
+
+
+def drop_indexes():
+    """Drop the non-unique model indexes to reproduce an older database."""
+    for table in (Lead.__table__, Notification.__table__):
+        for index in table.indexes:
+            db.session.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+    db.session.commit()
+
+
+def measure():
+    """Return {query name: (plan, best time in ms)}."""
+    results = {}
+    params = {'today': date.today()}
+    for name, sql in HOT_QUERIES.items():
+        plan = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql), params).fetchall()
+        timings = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            db.session.execute(text(sql), params).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = ('; '.join(row[-1] for row in plan), min(timings))
+    return results
+
+
+def main():
+    num_leads = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = create_app(path)
+    
+    with app.app_context():
+        db.create_all()
+        drop_indexes()
+        print(f"🌱 Seeding {num_leads} leads and notifications...")
+        seed(num_leads)
+        db.session.execute(text('ANALYZE'))
+        before = measure()
+        
+        upgrade_database()
+        db.session.execute(text('ANALYZE'))
+        after = measure()
+    
+    for name in HOT_QUERIES:
+        plan_before, ms_before = before[name]
+        plan_after, ms_after = after[name]
+        print(f"\n📊 {name}")
+        print(f"   before: {ms_before:8.2f} ms  {plan_before}")
+        print(f"   after:  {ms_after:8.2f} ms  {plan_after}")
+
+
+if __name__ == '__main__':
+    main()
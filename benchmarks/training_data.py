@@ -0,0 +1,80 @@
+"""
+Training Data Generator
+Writes a SQLite file of synthetic leads with converted/lost outcomes for
+exercising the training pipeline at scale
+
+Usage: python -m benchmarks.training_data path/to/leads.db [num_leads]
+Then:  flask --app app train-model --database path/to/leads.db
+"""
+import sys
+import time
+from datetime import datetime
+import numpy as np
+from sqlalchemy import create_engine
+from database.models import Lead
+
+SOURCES = ['website', 'referral', 'cold_call', 'linkedin', 'advertisement', 'other']
+SIZES = ['small', 'medium', 'large', 'enterprise']
+BUDGETS = ['unknown', 'low', 'medium', 'high']
+TIMELINES = ['unknown', 'long_term', 'short_term', 'immediate']
+STATUSES = ['new', 'qualified', 'contacted']
+
+# Hidden log-odds contributions that decide the outcomes
+SOURCE_EFFECT = np.array([0.0, 1.0, -0.8, 0.5, -0.5, -1.0])
+SIZE_EFFECT = np.array([-0.6, 0.0, 0.4, 0.8])
+BUDGET_EFFECT = np.array([-0.8, -0.4, 0.2, 1.0])
+TIMELINE_EFFECT = np.array([-0.5, -0.7, 0.3, 1.2])
+
+CHUNK_SIZE = 50000
+
+
+def generate(path, num_leads):
+    """Create the leads table in a fresh SQLite file and fill it."""
+    engine = create_engine('sqlite:///' + path)
+    Lead.__table__.create(engine, checkfirst=True)
+    rng = np.random.default_rng(0)
+    now = datetime.utcnow()
+    
+    for start in range(0, num_leads, CHUNK_SIZE):
+        count = min(CHUNK_SIZE, num_leads - start)
+        source = rng.integers(len(SOURCES), size=count)
+        size = rng.integers(len(SIZES), size=count)
+        engagement = rng.integers(1, 6, size=count)
+        budget = rng.integers(len(BUDGETS), size=count)
+        timeline = rng.integers(len(TIMELINES), size=count)
+        
+        log_odds = (SOURCE_EFFECT[source] + SIZE_EFFECT[size] + BUDGET_EFFECT[budget]
+                    + TIMELINE_EFFECT[timeline] + 0.4 * (engagement - 3) - 0.5)
+        converted = rng.random(count) < 1 / (1 + np.exp(-log_odds))
+        # Most leads have an outcome; the rest are still open
+        closed = rng.random(count) < 0.8
+        open_status = rng.integers(len(STATUSES), size=count)
+        
+        rows = [{
+            'name': f'Lead {start + i}',
+            'email': f'lead{start + i}@example.com',
+            'source': SOURCES[source[i]],
+            'company_size': SIZES[size[i]],
+            'engagement_level': int(engagement[i]),
+            'budget_range': BUDGETS[budget[i]],
+            'timeline': TIMELINES[timeline[i]],
+            'status': ('converted' if converted[i] else 'lost') if closed[i] else STATUSES[open_status[i]],
+            'ai_score': int(rng.integers(0, 101)),
+            'created_at': now,
+            'updated_at': now
+        } for i in range(count)]
+        
+        with engine.begin() as connection:
+            connection.execute(Lead.__table__.insert(), rows)
+
+
+def main():
+    path = sys.argv[1]
+    num_leads = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    start = time.perf_counter()
+    generate(path, num_leads)
+    print(f"✅ Wrote {num_leads} leads to {path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
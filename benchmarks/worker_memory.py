@@ -0,0 +1,100 @@
+"""
+Worker Memory Benchmark
+Compares gunicorn workers that each load the AI model with workers forked
+from a master that preloaded it (gunicorn.conf.py)
+
+Usage: python -m benchmarks.worker_memory [workers]
+Requires gunicorn and Linux (/proc)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Old behaviour: no preload, every worker loads the model for itself
+PER_WORKER_CONFIG = '''
+preload_app = False
+
+def post_worker_init(worker):
+    from ai import lead_scorer
+    lead_scorer.warm_up()
+'''
+
+
+def pss_mb(pid):
+    """Proportional set size of a process, counting shared pages fractionally."""
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def children(pid):
+    """PIDs of the direct children of a process."""
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def measure(config_path, workers, port):
+    """Start gunicorn, wait until every worker answers, then read memory."""
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', config_path, '-w', str(workers),
+         '-b', f'127.0.0.1:{port}', 'app:app'],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError('gunicorn exited during startup')
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/auth/login', timeout=1)
+                if len(children(server.pid)) == workers:
+                    break
+            except OSError:
+                pass
+            time.sleep(0.05)
+        ready_seconds = time.perf_counter() - start
+        
+        # Give the remaining workers time to finish booting
+        time.sleep(2)
+        worker_pss = [pss_mb(pid) for pid in children(server.pid)]
+        return {
+            'ready_seconds': ready_seconds,
+            'master_mb': pss_mb(server.pid),
+            'worker_mb': sum(worker_pss) / len(worker_pss),
+            'total_mb': pss_mb(server.pid) + sum(worker_pss)
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    
+    with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False) as f:
+        f.write(PER_WORKER_CONFIG)
+    
+    try:
+        results = {
+            'per-worker load': measure(f.name, workers, 8101),
+            'preload (master)': measure(os.path.join(ROOT, 'gunicorn.conf.py'), workers, 8102)
+        }
+    finally:
+        os.unlink(f.name)
+    
+    print(f"{workers} workers")
+    print(f"{'':18} {'first response':>15} {'master PSS':>11} {'worker PSS':>11} {'total PSS':>10}")
+    for name, result in results.items():
+        print(f"{name:18} {result['ready_seconds']:13.2f} s {result['master_mb']:8.1f} MB "
+              f"{result['worker_mb']:8.1f} MB {result['total_mb']:7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
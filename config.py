@@ -28,8 +28,12 @@ class Config:
         'low': 0         # Score < 40: Low priority
     }
     
+    # Background job settings
+    JOB_WORKERS = 2  # Threads per process running batch jobs
+    
     # Notification settings
     NOTIFICATION_REMINDER_DAYS = 3
+    NOTIFICATION_STREAM_MAX_CLIENTS = 12  # Open event streams per process (beyond: clients poll)
     HIGH_PRIORITY_THRESHOLD = 70
 
 class DevelopmentConfig(Config):
@@ -43,10 +47,20 @@ class ProductionConfig(Config):
     # Use PostgreSQL or MySQL in production
     # SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
 
+class TestingConfig(Config):
+    """Testing configuration."""
+    TESTING = True
+    DEBUG = False
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    # Fail any request issuing more SQL statements than this (N+1 guard);
+    # views can raise their own limit with database.loading.query_budget
+    QUERY_BUDGET = 15
+
 # Configuration mapping
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
 
@@ -192,14 +192,20 @@ def seed_database():
         sample_data = generate_sample_data()
         created_count = 0
         
+        leads = []
         for lead_data in sample_data:
             # Create lead
             lead = Lead(**lead_data)
             db.session.add(lead)
-            db.session.flush()  # Get the lead ID
-            
-            # Score with AI
-            lead.ai_score = lead_scorer.score_lead(lead)
+            leads.append(lead)
+        
+        db.session.flush()  # Get the lead IDs
+        
+        # Score all leads with AI in one batch
+        scores = lead_scorer.score_leads(leads)
+        
+        for lead, score in zip(leads, scores.tolist()):
+            lead.ai_score = score
             
             # Get recommendation
             recommendation = recommendation_engine.get_recommendation(lead)
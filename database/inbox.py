@@ -0,0 +1,128 @@
+"""
+Notification Inbox
+Keyset-paginated notifications with a per-user read-up-to cursor
+"""
+from sqlalchemy import func, select
+from database.db_instance import db
+from database.models import Notification, LeadStat, User
+from database.statistics import UNREAD_KEY
+
+# Notifications per inbox page (and the max a client may ask for)
+INBOX_PAGE_SIZE = 50
+MAX_INBOX_PAGE_SIZE = 200
+
+# Unread counts stop at this many (shown as "999+"), so a user who has not
+# opened the inbox in months costs no more than one who did yesterday
+UNREAD_COUNT_CAP = 999
+
+
+def read_through(user):
+    """Highest notification id the user has marked read in bulk (0 if none)."""
+    return user.notifications_read_through or 0
+
+
+def is_unread(notification, cursor):
+    """Whether a notification is unread for a user with the given read cursor."""
+    return not notification.is_read and notification.id > cursor
+
+
+def _unread_filter(cursor):
+    """Unread past the cursor: one range of the (is_read, id) index."""
+    return (Notification.is_read == False, Notification.id > cursor)
+
+
+def inbox_page(user, unread_only=False, before_id=None, limit=INBOX_PAGE_SIZE, options=()):
+    """
+    Fetch one page of a user's inbox, newest first.
+    
+    Pages are keyed on the last notification id, so every page is a single
+    index range scan however deep it is and however large the table grows.
+    
+    Args:
+        user: User whose read cursor applies
+        unread_only: Only notifications that are unread for the user
+        before_id: Cursor from the previous page (None for the first page)
+        limit: Page size
+        options: Loader options for the query (see database.loading)
+    
+    Returns:
+        tuple: (notifications, next_cursor) where next_cursor is None on the last page
+    """
+    query = Notification.query.options(*options)
+    if unread_only:
+        query = query.filter(*_unread_filter(read_through(user)))
+    if before_id is not None:
+        query = query.filter(Notification.id < before_id)
+    
+    notifications = query.order_by(Notification.id.desc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        next_cursor = notifications[-1].id
+    
+    return notifications, next_cursor
+
+
+def unread_count(user, cap=UNREAD_COUNT_CAP):
+    """
+    Count the user's unread notifications, up to cap.
+    
+    Counts entries of the (is_read, id) index past the user's read cursor;
+    the LIMIT bounds the scan when the backlog is large.
+    
+    Args:
+        user: User whose read cursor applies
+        cap: Stop counting after this many
+    
+    Returns:
+        int: Unread count (cap means "cap or more")
+    """
+    unread = select(Notification.id).where(*_unread_filter(read_through(user))).limit(cap).subquery()
+    return db.session.execute(select(func.count()).select_from(unread)).scalar()
+
+
+def inbox_version(user_id):
+    """
+    Cheap change marker for a user's unread count, used as its ETag.
+    
+    Combines the newest notification id, the unread counter and the user's
+    read cursor: one statement of three primary-key lookups, however many
+    notifications there are. Any insert, read/unread change, delete of an
+    unread notification or mark-all-read changes it.
+    
+    Args:
+        user_id: User whose read cursor applies
+    
+    Returns:
+        str: Opaque version string
+    """
+    row = db.session.execute(select(
+        select(func.max(Notification.id)).scalar_subquery(),
+        select(LeadStat.value).where(LeadStat.key == UNREAD_KEY).scalar_subquery(),
+        select(User.notifications_read_through).where(User.id == user_id).scalar_subquery()
+    )).one()
+    return '.'.join(str(value or 0) for value in row)
+
+
+def mark_all_read(user):
+    """
+    Mark everything in the user's inbox read by moving the read cursor.
+    
+    One MAX(id) lookup on the primary key and one single-row UPDATE,
+    however many notifications there are.
+    
+    Args:
+        user: User to update (the caller commits)
+    
+    Returns:
+        int: The new read cursor
+    """
+    latest = db.session.query(func.max(Notification.id)).scalar() or 0
+    user.notifications_read_through = max(read_through(user), latest)
+    return user.notifications_read_through
+
+
+def notification_dict(notification, cursor):
+    """Notification as JSON, with is_read as seen by a user with the given read cursor."""
+    return {**notification.to_dict(), 'is_read': not is_unread(notification, cursor)}
@@ -0,0 +1,133 @@
+"""
+Lead Batch Actions
+Set-based status changes, deletes and re-scoring for many leads in one transaction
+"""
+from datetime import datetime
+from sqlalchemy import bindparam, select
+from database.db_instance import db
+from database.models import Lead, Notification
+from database.notification_hub import notification_hub
+from database.statistics import (
+    UNREAD_KEY, adjust_lead_statistics, lead_count_deltas, status_change_deltas
+)
+from ai import lead_scorer
+from ai.recommendation import recommendation_engine
+
+BATCH_ACTIONS = ('status', 'delete', 'rescore')
+LEAD_STATUSES = ('new', 'qualified', 'converted', 'lost')
+
+# Leads whose recommendation is refreshed per executemany UPDATE after a rescore
+RECOMMENDATION_BATCH_SIZE = 1000
+
+
+def apply_batch_action(criterion, action, status=None):
+    """
+    Apply one action to every lead matching a filter, in a single transaction.
+    
+    Each action is a handful of set-based statements over the selection
+    (no per-lead ORM loads or flushes), with the stats counters adjusted
+    from the same transaction. Nothing is committed if any step fails.
+    
+    Args:
+        criterion: SQL filter on Lead selecting the leads
+        action: 'status', 'delete' or 'rescore'
+        status: New status for the 'status' action
+    
+    Returns:
+        dict: Number of leads affected, plus rescore counts for 'rescore'
+    """
+    if action not in BATCH_ACTIONS:
+        raise ValueError(f'Unknown batch action: {action}')
+    if action == 'status' and status not in LEAD_STATUSES:
+        raise ValueError(f'Unknown lead status: {status}')
+    
+    try:
+        if action == 'status':
+            result = _update_status(criterion, status)
+        elif action == 'delete':
+            result = _delete_leads(criterion)
+        else:
+            result = _rescore_leads(criterion)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    if result.get('notifications_deleted'):
+        # Bulk DELETE bypasses the ORM events that feed the hub
+        notification_hub.publish_changed()
+    return result
+
+
+def _update_status(criterion, status):
+    """Move the selected leads to one status with a single UPDATE."""
+    old_statuses = [old for (old,) in db.session.query(Lead.status).filter(criterion)]
+    table = Lead.__table__
+    db.session.execute(
+        table.update().where(criterion).values(status=status, updated_at=datetime.utcnow())
+    )
+    adjust_lead_statistics(db.session.connection(), status_change_deltas(old_statuses, status))
+    return {'affected': len(old_statuses)}
+
+
+def _delete_leads(criterion):
+    """Delete the selected leads and their notifications with one DELETE each."""
+    removed = db.session.query(Lead.status, Lead.ai_score).filter(criterion).all()
+    if not removed:
+        return {'affected': 0, 'notifications_deleted': 0}
+    
+    lead_ids = select(Lead.id).where(criterion)
+    unread = db.session.query(Notification.id).filter(
+        Notification.lead_id.in_(lead_ids), Notification.is_read.is_(False)
+    ).count()
+    
+    # The ORM cascade would load and delete each notification; do it in bulk
+    notifications = db.session.execute(
+        Notification.__table__.delete().where(Notification.lead_id.in_(lead_ids))
+    )
+    db.session.execute(Lead.__table__.delete().where(criterion))
+    
+    statuses, scores = zip(*removed)
+    deltas = lead_count_deltas(statuses, scores, sign=-1)
+    deltas[UNREAD_KEY] = -unread
+    adjust_lead_statistics(db.session.connection(), deltas)
+    return {'affected': len(removed), 'notifications_deleted': notifications.rowcount}
+
+
+def _rescore_leads(criterion):
+    """Batch-score the selected leads, then refresh their recommendations."""
+    counts = lead_scorer.rescore_leads(criterion, commit=False)
+    _refresh_recommendations(criterion)
+    return {'affected': counts['processed'], **counts}
+
+
+def _refresh_recommendations(criterion):
+    """Recompute recommended_action for the selected leads, one page at a time."""
+    table = Lead.__table__
+    update_stmt = table.update().where(table.c.id == bindparam('lead_id')).values(
+        recommended_action=bindparam('action')
+    )
+    
+    last_id = 0
+    while True:
+        rows = db.session.query(
+            Lead.id, Lead.ai_score, Lead.engagement_level, Lead.timeline, Lead.source,
+            Lead.budget_range, Lead.company_size, Lead.status
+        ).filter(criterion, Lead.id > last_id).order_by(Lead.id).limit(RECOMMENDATION_BATCH_SIZE).all()
+        if not rows:
+            break
+        
+        ids, *values = zip(*rows)
+        columns = dict(zip(
+            ('ai_score', 'engagement_level', 'timeline', 'source', 'budget_range', 'company_size', 'status'),
+            values
+        ))
+        codes = recommendation_engine.recommend_many(columns).tolist()
+        db.session.execute(update_stmt, [
+            {
+                'lead_id': lead_id,
+                'action': recommendation_engine.ACTIONS[recommendation_engine.decode_outcome(code)[0]]['action']
+            }
+            for lead_id, code in zip(ids, codes)
+        ])
+        last_id = ids[-1]
@@ -0,0 +1,354 @@
+"""
+Lead Bulk Import
+Streams CSV/JSONL uploads into the leads table in validated, scored chunks
+"""
+import csv
+import io
+import json
+import re
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from database.db_instance import db
+from database.models import Lead
+from database.statistics import adjust_lead_statistics, lead_count_deltas
+from ai import lead_scorer
+from ai.recommendation import recommendation_engine
+
+# Rows validated, de-duplicated, scored and inserted together
+IMPORT_CHUNK_SIZE = 1000
+
+# Row errors listed in the response (the counts always cover every row)
+MAX_REPORTED_ERRORS = 500
+
+# Days until the first follow-up, by recommendation priority (as add_lead)
+FOLLOWUP_DAYS = {'high': 1, 'medium': 3, 'low': 7}
+
+# Header spellings accepted for each lead field
+FIELD_ALIASES = {
+    'name': ('name', 'full_name', 'contact_name'),
+    'email': ('email', 'email_address', 'e_mail'),
+    'phone': ('phone', 'phone_number', 'telephone'),
+    'company': ('company', 'company_name', 'organization'),
+    'job_title': ('job_title', 'title', 'position', 'role'),
+    'source': ('source', 'lead_source'),
+    'company_size': ('company_size', 'size', 'employees'),
+    'engagement_level': ('engagement_level', 'engagement'),
+    'budget_range': ('budget_range', 'budget'),
+    'timeline': ('timeline', 'buying_timeline'),
+    'status': ('status', 'stage')
+}
+HEADER_FIELDS = {alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+# Free-text categorical values mapped onto the values the app uses
+SOURCE_ALIASES = {
+    'website': 'website', 'web': 'website', 'web_form': 'website', 'inbound': 'website',
+    'referral': 'referral', 'partner_referral': 'referral', 'partner': 'referral', 'customer_referral': 'referral',
+    'cold_call': 'cold_call', 'call': 'cold_call', 'phone': 'cold_call', 'outbound': 'cold_call',
+    'linkedin': 'linkedin', 'linked_in': 'linkedin', 'social': 'linkedin',
+    'advertisement': 'advertisement', 'ad': 'advertisement', 'ads': 'advertisement',
+    'email_campaign': 'advertisement', 'campaign': 'advertisement', 'marketing': 'advertisement',
+    'other': 'other', 'trade_show': 'other', 'industry_event': 'other', 'event': 'other', 'conference': 'other'
+}
+LEAD_SOURCES = ('website', 'referral', 'cold_call', 'linkedin', 'advertisement', 'other')
+COMPANY_SIZES = ('small', 'medium', 'large', 'enterprise')
+BUDGET_RANGES = ('unknown', 'low', 'medium', 'high', 'enterprise')
+TIMELINES = ('unknown', 'immediate', 'short_term', 'long_term')
+TIMELINE_ALIASES = {
+    'asap': 'immediate', 'now': 'immediate', 'urgent': 'immediate',
+    'short': 'short_term', 'long': 'long_term', 'tbd': 'unknown', 'n_a': 'unknown'
+}
+STATUS_ALIASES = {
+    'new': 'new', 'active': 'new', 'open': 'new', 'pending': 'new', 'contacted': 'new',
+    'qualified': 'qualified', 'negotiating': 'qualified', 'negotiation': 'qualified', 'proposal': 'qualified',
+    'converted': 'converted', 'won': 'converted', 'closed_won': 'converted', 'customer': 'converted',
+    'lost': 'lost', 'closed_lost': 'lost', 'dead': 'lost', 'disqualified': 'lost'
+}
+
+AMOUNT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*([km]?)(?![a-z])')
+QUARTER_PATTERN = re.compile(r'^q([1-4])_?(\d{4})$')
+
+
+class RowError(ValueError):
+    """A row that cannot be imported."""
+
+
+def import_leads(file, filename=''):
+    """
+    Import leads from an uploaded CSV or JSONL file.
+    
+    Rows are parsed one at a time from the upload stream, validated and
+    normalized, then handled in chunks: duplicate emails are dropped with a
+    set lookup (against the file so far and one IN query per chunk against
+    the table), scores and recommendations are computed for the whole chunk
+    and the chunk is inserted with one executemany INSERT and committed.
+    
+    Args:
+        file: Binary file object of the upload
+        filename: Upload name; .jsonl/.ndjson selects JSON Lines, else CSV
+    
+    Returns:
+        dict: Counts, per-row error report and throughput
+    """
+    started = time.perf_counter()
+    report = {'total_rows': 0, 'imported_count': 0, 'duplicate_count': 0, 'error_count': 0, 'errors': []}
+    seen_emails = set()
+    chunk = []
+    
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    rows = _jsonl_rows(text) if filename.lower().endswith(('.jsonl', '.ndjson')) else _csv_rows(text)
+    
+    for row_number, record in rows:
+        report['total_rows'] += 1
+        try:
+            lead = _normalize(record)
+        except RowError as e:
+            _add_error(report, row_number, str(e))
+            continue
+        if lead['email'] in seen_emails:
+            _add_error(report, row_number, f"duplicate email {lead['email']} earlier in the file", 'duplicate_count')
+            continue
+        seen_emails.add(lead['email'])
+        
+        chunk.append((row_number, lead))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            _import_chunk(chunk, report)
+            chunk = []
+    
+    if chunk:
+        _import_chunk(chunk, report)
+    
+    # Table duplicates are found per chunk, after the file's own errors
+    report['errors'].sort(key=lambda error: error['row'])
+    seconds = time.perf_counter() - started
+    report['seconds'] = round(seconds, 3)
+    report['rows_per_sec'] = round(report['total_rows'] / seconds, 1) if seconds else None
+    report['errors_truncated'] = report['error_count'] + report['duplicate_count'] > len(report['errors'])
+    return report
+
+
+def _csv_rows(text):
+    """Yield (line number, record) for each CSV data row."""
+    reader = csv.DictReader(text)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def _jsonl_rows(text):
+    """Yield (line number, record) for each non-blank JSON Lines row."""
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        # Bad lines still get reported against their line number
+        yield line_number, record if isinstance(record, dict) else {'__invalid__': True}
+
+
+def _add_error(report, row_number, message, counter='error_count'):
+    """Count a skipped row and list it while under MAX_REPORTED_ERRORS."""
+    report[counter] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'row': row_number, 'error': message})
+
+
+def _import_chunk(chunk, report):
+    """De-duplicate against the table, score, recommend and insert one chunk."""
+    emails = [lead['email'] for row_number, lead in chunk]
+    # Imported emails are lowercased, but older rows may be mixed-case
+    lower_email = func.lower(Lead.email)
+    existing = {email for (email,) in db.session.query(lower_email).filter(lower_email.in_(emails))}
+    
+    leads = []
+    for row_number, lead in chunk:
+        if lead['email'] in existing:
+            _add_error(report, row_number, f"duplicate email {lead['email']} already exists", 'duplicate_count')
+        else:
+            leads.append(lead)
+    if not leads:
+        return
+    
+    columns = {name: [lead[name] for lead in leads] for name in lead_scorer.FEATURE_COLUMNS}
+    scores, model_version = lead_scorer.score_leads_with_version(columns)
+    fingerprints = lead_scorer.feature_fingerprints(columns)
+    
+    columns['ai_score'] = scores
+    columns['status'] = [lead['status'] for lead in leads]
+    codes = recommendation_engine.recommend_many(columns)
+    
+    today = datetime.utcnow().date()
+    for lead, score, fingerprint, code in zip(leads, scores.tolist(), fingerprints, codes.tolist()):
+        action = recommendation_engine.ACTIONS[recommendation_engine.decode_outcome(code)[0]]
+        lead['ai_score'] = score
+        lead['score_fingerprint'] = fingerprint
+        lead['score_model_version'] = model_version
+        lead['recommended_action'] = action['action']
+        lead['next_followup'] = today + timedelta(days=FOLLOWUP_DAYS[action['priority']])
+    
+    db.session.execute(Lead.__table__.insert(), leads)
+    # Bulk INSERT bypasses the ORM events that maintain the stats counters
+    adjust_lead_statistics(db.session.connection(), lead_count_deltas(
+        [lead['status'] for lead in leads], [lead['ai_score'] for lead in leads]
+    ))
+    db.session.commit()
+    report['imported_count'] += len(leads)
+
+
+def _normalize(record):
+    """
+    Validate one record and map it onto Lead column values.
+    
+    Raises:
+        RowError: If a required field is missing or a value is not recognized
+    """
+    if record.get('__invalid__'):
+        raise RowError('not a JSON object')
+    
+    fields = {}
+    for key, value in record.items():
+        field = HEADER_FIELDS.get(_slug(key))
+        if field is not None and value is not None and str(value).strip():
+            fields[field] = str(value).strip()
+    
+    name = fields.get('name', '')
+    if len(name) < 2:
+        raise RowError('name must be at least 2 characters')
+    email = fields.get('email', '').lower()
+    if '@' not in email:
+        raise RowError('missing or invalid email')
+    
+    return {
+        'name': name[:100],
+        'email': email[:120],
+        'phone': fields.get('phone', '')[:20] or None,
+        'company': fields.get('company', '')[:100] or 'Unknown',
+        'job_title': fields.get('job_title', '')[:100] or None,
+        'source': _normalize_source(fields.get('source')),
+        'company_size': _normalize_company_size(fields.get('company_size')),
+        'engagement_level': _normalize_engagement(fields.get('engagement_level')),
+        'budget_range': _normalize_budget(fields.get('budget_range')),
+        'timeline': _normalize_timeline(fields.get('timeline')),
+        'status': _normalize_status(fields.get('status'))
+    }
+
+
+def _slug(value):
+    """'Company Size' / 'company-size' -> 'company_size'."""
+    return re.sub(r'[^a-z0-9]+', '_', str(value).lower()).strip('_')
+
+
+def _amounts(value):
+    """Numbers in a value, with k/m suffixes applied: '100k-500k' -> [100000.0, 500000.0]."""
+    return [
+        float(number) * {'': 1, 'k': 1000, 'm': 1000000}[unit]
+        for number, unit in AMOUNT_PATTERN.findall(value.lower().replace(',', ''))
+    ]
+
+
+def _normalize_source(value):
+    if value is None:
+        return 'website'
+    source = SOURCE_ALIASES.get(_slug(value))
+    if source is None:
+        raise RowError(f"unknown source '{value}'")
+    return source
+
+
+def _normalize_company_size(value):
+    """Size names, or employee counts such as '51-500' or '500+'."""
+    if value is None:
+        return 'medium'
+    slug = _slug(value)
+    if slug in COMPANY_SIZES:
+        return slug
+    numbers = _amounts(value)
+    if not numbers:
+        raise RowError(f"unknown company size '{value}'")
+    # Bucket on the lower bound, matching the form's 1-50 / 51-500 / 500+
+    employees = numbers[0]
+    if employees >= 5000:
+        return 'enterprise'
+    if employees >= 500:
+        return 'large'
+    if employees > 50:
+        return 'medium'
+    return 'small'
+
+
+def _normalize_engagement(value):
+    if value is None:
+        return 1
+    try:
+        level = int(float(value))
+    except (ValueError, OverflowError):
+        raise RowError(f"engagement level '{value}' is not a number")
+    if not 1 <= level <= 5:
+        raise RowError(f'engagement level {level} is not between 1 and 5')
+    return level
+
+
+def _normalize_budget(value):
+    """Budget names, or amounts such as '100k-500k', '500k+' or '$25,000'."""
+    if value is None:
+        return 'unknown'
+    slug = _slug(value)
+    if slug in BUDGET_RANGES:
+        return slug
+    amounts = _amounts(value)
+    if not amounts:
+        raise RowError(f"unknown budget '{value}'")
+    # Bucket on the lower bound of the range
+    low = amounts[0]
+    if low >= 500000:
+        return 'enterprise'
+    if low >= 100000:
+        return 'high'
+    if low >= 25000:
+        return 'medium'
+    return 'low'
+
+
+def _normalize_timeline(value):
+    """Timeline names, durations such as '1-2 months' or '6+ months', or quarters such as 'Q3 2026'."""
+    if value is None:
+        return 'unknown'
+    slug = _slug(value)
+    if slug in TIMELINES:
+        return slug
+    if slug in TIMELINE_ALIASES:
+        return TIMELINE_ALIASES[slug]
+    
+    quarter = QUARTER_PATTERN.match(slug)
+    if quarter:
+        today = datetime.utcnow().date()
+        start_month = (int(quarter.group(2)) * 12 + (int(quarter.group(1)) - 1) * 3)
+        months = start_month - (today.year * 12 + today.month - 1)
+    else:
+        numbers = [float(number) for number, unit in AMOUNT_PATTERN.findall(value.lower())]
+        if not numbers:
+            raise RowError(f"unknown timeline '{value}'")
+        # Use the far end of a range; weeks and years are converted to months
+        months = numbers[-1]
+        if 'week' in slug:
+            months /= 4
+        elif 'year' in slug:
+            months *= 12
+        elif 'month' not in slug:
+            raise RowError(f"unknown timeline '{value}'")
+    
+    if months <= 0:
+        return 'immediate'
+    if months <= 3 and '+' not in value:
+        return 'short_term'
+    return 'long_term'
+
+
+def _normalize_status(value):
+    if value is None:
+        return 'new'
+    status = STATUS_ALIASES.get(_slug(value))
+    if status is None:
+        raise RowError(f"unknown status '{value}'")
+    return status
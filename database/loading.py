@@ -0,0 +1,83 @@
+"""
+Relationship Loading Policies
+Per-query eager loading options and a per-request query budget guard
+"""
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from database.db_instance import db
+from database.models import Lead, Notification
+
+# Notification lists that show the lead: many-to-one, so join the lead's
+# id and name into the same SELECT
+NOTIFICATIONS_WITH_LEAD = (
+    joinedload(Notification.lead).load_only(Lead.id, Lead.name),
+)
+
+# Lead detail: the lead's notifications in one extra SELECT ... IN
+# (selectin keeps the lead row from being repeated per notification)
+LEAD_WITH_NOTIFICATIONS = (
+    selectinload(Lead.notifications),
+)
+
+# Lists that never touch relationships: any lazy load is a bug, so make it
+# raise instead of quietly issuing one SELECT per row
+NO_RELATIONSHIPS = (
+    raiseload('*', sql_only=True),
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request issued more SQL statements than its budget allows."""
+
+
+def query_budget(limit):
+    """
+    Override the query budget for one view.
+    
+    Args:
+        limit: Maximum statements the view may issue per request, or None
+            for views whose statement count grows with the data (chunked
+            imports, batch actions)
+    """
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
+
+
+def init_query_budget(app):
+    """
+    Count SQL statements per request and fail requests that exceed their budget.
+    
+    Only active when the app config sets QUERY_BUDGET (the testing config
+    does), so an N+1 regression fails the request that introduced it.
+    
+    Args:
+        app: Flask application
+    """
+    if not app.config.get('QUERY_BUDGET'):
+        return
+    
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _count_statement)
+    
+    @app.before_request
+    def reset_query_count():
+        g.query_statements = []
+
+
+def _count_statement(connection, cursor, statement, parameters, context, executemany):
+    """Record one statement and raise once the request is over budget."""
+    if not has_request_context() or 'query_statements' not in g:
+        return
+    g.query_statements.append(statement)
+    
+    view = current_app.view_functions.get(request.endpoint)
+    limit = getattr(view, 'query_budget', current_app.config['QUERY_BUDGET'])
+    if limit is not None and len(g.query_statements) > limit:
+        issued = '\n'.join(f'  {s[:120]}' for s in g.query_statements)
+        raise QueryBudgetExceeded(
+            f'{request.endpoint} issued {len(g.query_statements)} queries (budget {limit}):\n{issued}'
+        )
@@ -0,0 +1,80 @@
+"""
+Database Migrations
+Brings existing SQLite files up to date with the current models
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+from database.db_instance import db
+
+# Indexes replaced by newer ones, dropped from existing databases
+RETIRED_INDEXES = {
+    'notifications': ('ix_notifications_is_read_created_at',)
+}
+
+# Columns made NOT NULL after the fact: SQLite cannot add the constraint to
+# an existing table, so NULLs left in older files are set to these values
+NOT_NULL_BACKFILLS = {
+    'leads': {'ai_score': 0}
+}
+
+
+def upgrade_database():
+    """
+    Apply schema changes that db.create_all() does not make to existing tables.
+    
+    create_all only creates missing tables; columns and indexes added to an
+    existing table have to be created separately. New columns must be
+    nullable (or have a server default). Safe to run repeatedly.
+    
+    Returns:
+        list: Names of the columns (table.column) and indexes that were
+            created, 'dropped <name>' for retired indexes and
+            'backfilled table.column' for NULLs replaced
+    """
+    changes = []
+    inspector = inspect(db.engine)
+    
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+                with db.engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+                changes.append(f'{table.name}.{column.name}')
+        
+        # Read from sqlite_master: get_indexes skips expression indexes
+        with db.engine.connect() as connection:
+            existing_indexes = set(connection.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+                {'table': table.name}
+            ).scalars())
+        for name in RETIRED_INDEXES.get(table.name, ()):
+            if name in existing_indexes:
+                with db.engine.begin() as connection:
+                    connection.execute(text(f'DROP INDEX {name}'))
+                changes.append(f'dropped {name}')
+        
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=db.engine)
+                changes.append(index.name)
+        
+        for column, value in NOT_NULL_BACKFILLS.get(table.name, {}).items():
+            with db.engine.begin() as connection:
+                result = connection.execute(
+                    text(f'UPDATE {table.name} SET {column} = :value WHERE {column} IS NULL'),
+                    {'value': value}
+                )
+            if result.rowcount:
+                changes.append(f'backfilled {table.name}.{column}')
+    
+    if 'backfilled leads.ai_score' in changes:
+        # Unscored leads were in no priority counter; they are low priority now
+        from database.statistics import rebuild_lead_statistics
+        rebuild_lead_statistics()
+    
+    return changes
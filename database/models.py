@@ -1,7 +1,8 @@
 """
 Database Models for AI Sales Assistance Agent
-Defines Lead, Notification, and User models
+Defines Lead, Notification, User, LeadStat, and Job models
 """
+import json
 from datetime import datetime
 from database.db_instance import db
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -26,12 +27,15 @@ class Lead(db.Model):
     budget_range = db.Column(db.String(30), default='unknown')
     timeline = db.Column(db.String(30), default='unknown')
     
-    # Status tracking
-    status = db.Column(db.String(20), default='new')
+    # Status tracking (active_history keeps the old value for stats deltas)
+    status = db.column_property(db.Column(db.String(20), default='new'), active_history=True)
     
     # AI-generated data
-    ai_score = db.Column(db.Integer, default=0)
+    ai_score = db.column_property(db.Column(db.Integer, default=0, nullable=False), active_history=True)
     recommended_action = db.Column(db.String(100))
+    # What ai_score was computed from: a hash of the scoring features and the model version
+    score_fingerprint = db.Column(db.String(16))
+    score_model_version = db.Column(db.String(32))
     last_contacted = db.Column(db.DateTime)
     
     # Timestamps
@@ -39,8 +43,9 @@ class Lead(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     next_followup = db.Column(db.Date)
     
-    # Relationships
-    notifications = db.relationship('Notification', backref='lead', lazy=True, cascade='all, delete-orphan')
+    # Relationships (lazy by default; list views pick a strategy per query,
+    # see database.loading)
+    notifications = db.relationship('Notification', back_populates='lead', lazy='select', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Lead {self.name} - Score: {self.ai_score}>'
@@ -88,12 +93,14 @@ class Notification(db.Model):
     title = db.Column(db.String(200), nullable=False)
     message = db.Column(db.Text)
     priority = db.Column(db.String(20), default='medium')  # low, medium, high
-    is_read = db.Column(db.Boolean, default=False)
+    is_read = db.column_property(db.Column(db.Boolean, default=False), active_history=True)
     action_required = db.Column(db.Boolean, default=False)
     action_url = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime)
     
+    lead = db.relationship('Lead', back_populates='notifications')
+    
     def __repr__(self):
         return f'<Notification {self.title}>'
     
@@ -114,6 +121,27 @@ class Notification(db.Model):
         }
 
 
+# Indexes for the hot route queries (existing databases get them from
+# database.migrations.upgrade_database)
+
+# Leads listing: ORDER BY ai_score DESC, id (+ priority range filter)
+db.Index('ix_leads_ai_score_id', Lead.ai_score.desc(), Lead.id)
+# Leads listing filtered by status, status counts, recommendations by status
+db.Index('ix_leads_status_ai_score_id', Lead.status, Lead.ai_score.desc(), Lead.id)
+# Follow-up reminders: status IN (...) AND next_followup <= today
+db.Index('ix_leads_status_next_followup', Lead.status, Lead.next_followup)
+# Follow-up scheduler: upcoming follow-ups read in (next_followup, id) order
+db.Index('ix_leads_next_followup_id', Lead.next_followup, Lead.id)
+# Import de-duplication: lower(email) IN (...)
+db.Index('ix_leads_lower_email', db.func.lower(Lead.email))
+# Dashboard "recently added"
+db.Index('ix_leads_created_at', Lead.created_at.desc())
+# Unread inbox pages and counts: is_read = 0 AND id > read cursor
+db.Index('ix_notifications_is_read_id', Notification.is_read, Notification.id)
+# Per-lead lookups: cascades and "already has an unread reminder" checks
+db.Index('ix_notifications_lead_id_type_is_read', Notification.lead_id, Notification.type, Notification.is_read)
+
+
 class User(db.Model):
     """User model for system users."""
     
@@ -126,6 +154,8 @@ class User(db.Model):
     role = db.Column(db.String(20), default='sales_rep')  # admin, manager, sales_rep
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Notifications up to this id count as read for this user (see database.inbox)
+    notifications_read_through = db.Column(db.Integer, default=0)
     
     def set_password(self, password):
         """Hash and set the password."""
@@ -137,3 +167,65 @@ class User(db.Model):
     
     def __repr__(self):
         return f'<User {self.username}>'
+
+
+class LeadStat(db.Model):
+    """Materialized counter for dashboard statistics (see database.statistics)."""
+    
+    __tablename__ = 'lead_stats'
+    
+    key = db.Column(db.String(64), primary_key=True)  # total, priority:<p>, status:<s>, unread
+    value = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<LeadStat {self.key}={self.value}>'
+
+
+class Job(db.Model):
+    """Background job (batch scoring, reminders, reports) and its progress."""
+    
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # batch_score, reminders, report
+    status = db.Column(db.String(20), default='queued')  # queued, running, completed, failed
+    total = db.Column(db.Integer)
+    processed = db.Column(db.Integer, default=0)
+    result = db.Column(db.Text)  # JSON-encoded task result
+    error = db.Column(db.Text)
+    runner = db.Column(db.String(100))  # host:pid of the process running the job
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} - {self.status}>'
+    
+    def to_dict(self):
+        """Convert job to dictionary, including throughput and ETA."""
+        processed = self.processed or 0
+        rate = None
+        eta_seconds = None
+        
+        if self.started_at:
+            elapsed = ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds()
+            if elapsed > 0 and processed:
+                rate = processed / elapsed
+                if self.total and self.status == 'running':
+                    eta_seconds = max(0, (self.total - processed) / rate)
+        
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'total': self.total,
+            'processed': processed,
+            'progress': round(processed * 100 / self.total, 1) if self.total else None,
+            'leads_per_sec': round(rate, 1) if rate is not None else None,
+            'eta_seconds': round(eta_seconds) if eta_seconds is not None else None,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S') if self.started_at else None,
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None
+        }
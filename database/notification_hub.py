@@ -0,0 +1,121 @@
+"""
+Notification Hub
+In-process publish/subscribe for notification changes, feeding the SSE stream
+"""
+import queue
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from database.models import Notification
+
+# Events buffered per subscriber; a subscriber that falls further behind
+# misses events but still resyncs its count on its next wake-up
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Session.info key collecting events until the transaction commits
+PENDING_KEY = 'notification_events'
+
+CHANGED = {'type': 'changed'}
+
+
+class NotificationHub:
+    """
+    Fan-out of notification events to the streams open in this process.
+    
+    Events are published after commit: 'notification' events carry a new
+    notification, 'changed' events mean unread counts may have changed.
+    Only streams served by this process are reached; streams in other
+    worker processes catch up on their keep-alive check.
+    """
+    
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._subscribers)
+    
+    def subscribe(self, limit=None):
+        """
+        Register a new subscriber.
+        
+        Args:
+            limit: Maximum concurrent subscribers in this process
+        
+        Returns:
+            queue.Queue: Queue receiving events, or None if limit is reached
+        """
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            subscription = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+            self._subscribers.add(subscription)
+            return subscription
+    
+    def unsubscribe(self, subscription):
+        """Stop delivering events to a subscriber."""
+        with self._lock:
+            self._subscribers.discard(subscription)
+    
+    def publish(self, event):
+        """
+        Deliver an event to every subscriber without blocking.
+        
+        Args:
+            event: Dict with a 'type' key
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                pass
+    
+    def publish_changed(self):
+        """Tell subscribers that unread counts may have changed (e.g. after a bulk write)."""
+        self.publish(CHANGED)
+
+
+# Singleton instance
+notification_hub = NotificationHub()
+
+
+def _queue_event(target, event):
+    """Hold an event on the target's session until it commits."""
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, []).append(event)
+
+
+@event.listens_for(Notification, 'after_insert')
+def _notification_inserted(mapper, connection, target):
+    _queue_event(target, {'type': 'notification', 'notification': target.to_dict()})
+
+
+@event.listens_for(Notification, 'after_update')
+def _notification_updated(mapper, connection, target):
+    _queue_event(target, CHANGED)
+
+
+@event.listens_for(Notification, 'after_delete')
+def _notification_deleted(mapper, connection, target):
+    _queue_event(target, CHANGED)
+
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    events = session.info.pop(PENDING_KEY, None)
+    if not events:
+        return
+    for pending in events:
+        if pending is not CHANGED:
+            notification_hub.publish(pending)
+    # Subscribers recount on every event, so one 'changed' covers the batch
+    if any(pending is CHANGED for pending in events):
+        notification_hub.publish_changed()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _session_rolled_back(session):
+    session.info.pop(PENDING_KEY, None)
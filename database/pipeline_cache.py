@@ -0,0 +1,133 @@
+"""
+Pipeline Snapshot Cache
+Short-lived per-process cache of pipeline aggregates for the chatbot
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import case, func
+from database.db_instance import db
+from database.models import Lead
+from database.statistics import LeadStatistics, get_lead_statistics
+from jobs.tasks import FOLLOWUP_STATUSES
+
+# Snapshots older than this are refreshed in the background; answers may
+# lag the database by up to this much (plus one refresh)
+SNAPSHOT_TTL_SECONDS = 30
+
+# Leads listed for "top leads" questions
+TOP_LEADS_LIMIT = 5
+
+
+@dataclass(frozen=True)
+class PipelineSnapshot:
+    """Pipeline aggregates taken at one moment."""
+    
+    statistics: LeadStatistics = field(default_factory=LeadStatistics)
+    # Best-scored open leads: dicts with id, name, company, ai_score, status
+    top_leads: tuple = ()
+    overdue_followups: int = 0
+    followups_due_today: int = 0
+    taken_at: datetime = None
+
+
+def compute_pipeline_snapshot():
+    """
+    Query the aggregates behind the chatbot's live answers.
+    
+    A few small statements: the materialized counters, the top leads of
+    each open status (a status/score index walk that stops after
+    TOP_LEADS_LIMIT rows; IN over both statuses would sort every open
+    lead) and the due follow-up counts (one range of the
+    status/next_followup index).
+    
+    Returns:
+        PipelineSnapshot: The current aggregates
+    """
+    today = datetime.utcnow().date()
+    
+    top_leads = []
+    for status in FOLLOWUP_STATUSES:
+        top_leads.extend(db.session.query(
+            Lead.id, Lead.name, Lead.company, Lead.ai_score, Lead.status
+        ).filter(
+            Lead.status == status
+        ).order_by(Lead.ai_score.desc(), Lead.id).limit(TOP_LEADS_LIMIT).all())
+    top_leads.sort(key=lambda row: (-row.ai_score, row.id))
+    
+    overdue, due_today = db.session.query(
+        func.count(case((Lead.next_followup < today, 1))),
+        func.count(case((Lead.next_followup == today, 1)))
+    ).filter(
+        Lead.status.in_(FOLLOWUP_STATUSES),
+        Lead.next_followup <= today
+    ).one()
+    
+    return PipelineSnapshot(
+        statistics=get_lead_statistics(),
+        top_leads=tuple(row._asdict() for row in top_leads[:TOP_LEADS_LIMIT]),
+        overdue_followups=overdue,
+        followups_due_today=due_today,
+        taken_at=datetime.utcnow()
+    )
+
+
+class PipelineCache:
+    """
+    Per-process PipelineSnapshot, refreshed at most once per TTL.
+    
+    Only the first caller in a process waits for the queries. After that,
+    callers always get the cached snapshot at once; the first caller to
+    find it expired starts a single background refresh, and everyone keeps
+    reading the old snapshot until the new one is swapped in. However many
+    chat messages arrive, each process runs the aggregate queries at most
+    once per TTL.
+    """
+    
+    def __init__(self, ttl=SNAPSHOT_TTL_SECONDS):
+        self.ttl = ttl
+        self._snapshot = None
+        self._expires_at = 0
+        self._load_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+    
+    def get(self):
+        """
+        Current snapshot (call within an app context).
+        
+        Returns:
+            PipelineSnapshot: Snapshot at most about ttl seconds old
+        """
+        if self._snapshot is None:
+            with self._load_lock:
+                if self._snapshot is None:
+                    self._store(compute_pipeline_snapshot())
+            return self._snapshot
+        
+        # Only one refresh at a time; callers keep the old snapshot meanwhile
+        if time.monotonic() >= self._expires_at and self._refresh_lock.acquire(blocking=False):
+            app = current_app._get_current_object()
+            threading.Thread(target=self._refresh, args=(app,), daemon=True).start()
+        return self._snapshot
+    
+    def _store(self, snapshot):
+        self._snapshot = snapshot
+        self._expires_at = time.monotonic() + self.ttl
+    
+    def _refresh(self, app):
+        """Recompute the snapshot on the side, then swap it in."""
+        try:
+            with app.app_context():
+                self._store(compute_pipeline_snapshot())
+        except Exception as e:
+            # Keep serving the old snapshot; retry after another ttl
+            self._expires_at = time.monotonic() + self.ttl
+            print(f"⚠️ Could not refresh pipeline snapshot: {e}")
+        finally:
+            self._refresh_lock.release()
+
+
+# Singleton instance
+pipeline_cache = PipelineCache()
@@ -0,0 +1,311 @@
+"""
+Lead Statistics Query Layer
+Serves dashboard statistics from counters maintained on every write
+"""
+from dataclasses import dataclass, field
+from sqlalchemy import case, event, func, inspect
+from database.db_instance import db
+from database.models import Lead, Notification, LeadStat
+
+# Score thresholds for priority buckets (same as Lead.get_priority)
+HIGH_SCORE_THRESHOLD = 70
+MEDIUM_SCORE_THRESHOLD = 40
+
+# Counter keys in the lead_stats table
+TOTAL_KEY = 'total'
+# Notifications not flagged read, across all users: a change marker for the
+# inbox ETag (per-user unread counts go through database.inbox)
+UNREAD_KEY = 'unread'
+PRIORITY_PREFIX = 'priority:'
+STATUS_PREFIX = 'status:'
+
+
+@dataclass(frozen=True)
+class LeadStatistics:
+    """Snapshot of lead counts."""
+    
+    total_leads: int = 0
+    high_priority: int = 0
+    medium_priority: int = 0
+    low_priority: int = 0
+    status_counts: dict = field(default_factory=dict)
+    
+    @property
+    def priority_counts(self):
+        """Priority bucket counts keyed by 'high', 'medium' and 'low'."""
+        return {
+            'high': self.high_priority,
+            'medium': self.medium_priority,
+            'low': self.low_priority
+        }
+    
+    def to_dict(self):
+        """Convert statistics to dictionary for JSON serialization."""
+        return {
+            'total_leads': self.total_leads,
+            'status_counts': dict(self.status_counts),
+            'priority_counts': self.priority_counts
+        }
+
+
+def get_lead_statistics():
+    """
+    Read the materialized counters.
+    
+    Cost is one small SELECT whose size depends on the number of distinct
+    statuses, not on the number of leads.
+    
+    Returns:
+        LeadStatistics: The current statistics
+    """
+    counters = dict(db.session.query(LeadStat.key, LeadStat.value).all())
+    
+    return LeadStatistics(
+        total_leads=counters.get(TOTAL_KEY, 0),
+        high_priority=counters.get(PRIORITY_PREFIX + 'high', 0),
+        medium_priority=counters.get(PRIORITY_PREFIX + 'medium', 0),
+        low_priority=counters.get(PRIORITY_PREFIX + 'low', 0),
+        status_counts={
+            _status_from_key(key): value
+            for key, value in counters.items()
+            if key.startswith(STATUS_PREFIX) and value
+        }
+    )
+
+
+def compute_lead_statistics():
+    """
+    Compute the statistics from the base tables in one aggregate query.
+    
+    Leads are grouped by status with priority buckets summed per group.
+    Used to (re)build the counters.
+    
+    Returns:
+        LeadStatistics: The computed statistics
+    """
+    rows = db.session.query(
+        Lead.status,
+        func.count(Lead.id),
+        _bucket(Lead.ai_score >= HIGH_SCORE_THRESHOLD),
+        _bucket((Lead.ai_score >= MEDIUM_SCORE_THRESHOLD) & (Lead.ai_score < HIGH_SCORE_THRESHOLD)),
+        _bucket(Lead.ai_score < MEDIUM_SCORE_THRESHOLD)
+    ).group_by(Lead.status).all()
+    
+    return LeadStatistics(
+        total_leads=sum(row[1] for row in rows),
+        high_priority=sum(row[2] for row in rows),
+        medium_priority=sum(row[3] for row in rows),
+        low_priority=sum(row[4] for row in rows),
+        status_counts={row[0]: row[1] for row in rows}
+    )
+
+
+def rebuild_lead_statistics():
+    """
+    Recompute every counter from the base tables, fixing any drift.
+    
+    Returns:
+        LeadStatistics: The rebuilt statistics
+    """
+    stats = compute_lead_statistics()
+    
+    counters = {
+        TOTAL_KEY: stats.total_leads,
+        UNREAD_KEY: db.session.query(func.count(Notification.id)).filter(Notification.is_read == False).scalar()
+    }
+    for priority, count in stats.priority_counts.items():
+        counters[PRIORITY_PREFIX + priority] = count
+    for status, count in stats.status_counts.items():
+        counters[_status_key(status)] = count
+    
+    db.session.query(LeadStat).delete()
+    db.session.execute(
+        LeadStat.__table__.insert(),
+        [{'key': key, 'value': value} for key, value in counters.items()]
+    )
+    db.session.commit()
+    return stats
+
+
+def ensure_lead_statistics():
+    """Build the counters if they have never been built (e.g. an older database)."""
+    if db.session.get(LeadStat, TOTAL_KEY) is None:
+        rebuild_lead_statistics()
+
+
+def adjust_lead_statistics(connection, deltas):
+    """
+    Apply counter deltas on the given connection (inside the caller's transaction).
+    
+    Args:
+        connection: SQLAlchemy connection to write through
+        deltas: Dict of counter key -> signed change
+    """
+    table = LeadStat.__table__
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        result = connection.execute(
+            table.update().where(table.c.key == key).values(value=table.c.value + delta)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(key=key, value=delta))
+
+
+def priority_deltas(old_scores, new_scores):
+    """
+    Counter deltas for a bulk score change.
+    
+    Args:
+        old_scores: Scores before the change
+        new_scores: Scores after the change, aligned with old_scores
+    
+    Returns:
+        dict: Priority counter key -> signed change
+    """
+    deltas = {}
+    for old_score, new_score in zip(old_scores, new_scores):
+        _add_priority_change(deltas, _priority(old_score), _priority(new_score))
+    return deltas
+
+
+def lead_count_deltas(statuses, scores, sign=1):
+    """
+    Counter deltas for bulk-inserted (sign=1) or bulk-deleted (sign=-1) leads.
+    
+    Args:
+        statuses: Status of each lead
+        scores: ai_score of each lead, aligned with statuses
+        sign: 1 for added leads, -1 for removed leads
+    
+    Returns:
+        dict: Counter key -> signed change
+    """
+    deltas = {}
+    for status, score in zip(statuses, scores):
+        for key, delta in _lead_deltas(status, score, sign).items():
+            deltas[key] = deltas.get(key, 0) + delta
+    return deltas
+
+
+def status_change_deltas(old_statuses, new_status):
+    """
+    Counter deltas for a bulk status change.
+    
+    Args:
+        old_statuses: Status of each lead before the change
+        new_status: Status every lead is moved to
+    
+    Returns:
+        dict: Status counter key -> signed change
+    """
+    deltas = {}
+    for status in old_statuses:
+        if status != new_status:
+            deltas[_status_key(status)] = deltas.get(_status_key(status), 0) - 1
+            deltas[_status_key(new_status)] = deltas.get(_status_key(new_status), 0) + 1
+    return deltas
+
+
+def _bucket(condition):
+    """SUM(CASE WHEN condition THEN 1 ELSE 0 END)."""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _priority(score):
+    """Priority bucket name for one score, or None for a missing score."""
+    if score is None:
+        return None
+    if score >= HIGH_SCORE_THRESHOLD:
+        return 'high'
+    if score >= MEDIUM_SCORE_THRESHOLD:
+        return 'medium'
+    return 'low'
+
+
+def _add_priority_change(deltas, old, new):
+    """Accumulate the move of one lead between priority buckets."""
+    if old == new:
+        return
+    if old is not None:
+        deltas[PRIORITY_PREFIX + old] = deltas.get(PRIORITY_PREFIX + old, 0) - 1
+    if new is not None:
+        deltas[PRIORITY_PREFIX + new] = deltas.get(PRIORITY_PREFIX + new, 0) + 1
+
+
+def _status_key(status):
+    """Counter key for a lead status."""
+    return STATUS_PREFIX + (status or '')
+
+
+def _status_from_key(key):
+    """Lead status for a status counter key."""
+    return key[len(STATUS_PREFIX):] or None
+
+
+def _lead_deltas(status, score, sign):
+    """Counter deltas for adding (sign=1) or removing (sign=-1) one lead."""
+    deltas = {TOTAL_KEY: sign, _status_key(status): sign}
+    priority = _priority(score)
+    if priority is not None:
+        deltas[PRIORITY_PREFIX + priority] = sign
+    return deltas
+
+
+def _changed(target, attribute):
+    """Return (old, new) if the attribute changed in this flush, else None."""
+    history = inspect(target).attrs[attribute].history
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return old, new
+
+
+# Keep the counters in step with ORM writes. Bulk Core statements bypass
+# these events, so bulk writers call adjust_lead_statistics themselves.
+
+@event.listens_for(Lead, 'after_insert')
+def _lead_inserted(mapper, connection, target):
+    adjust_lead_statistics(connection, _lead_deltas(target.status, target.ai_score, 1))
+
+
+@event.listens_for(Lead, 'after_delete')
+def _lead_deleted(mapper, connection, target):
+    adjust_lead_statistics(connection, _lead_deltas(target.status, target.ai_score, -1))
+
+
+@event.listens_for(Lead, 'after_update')
+def _lead_updated(mapper, connection, target):
+    deltas = {}
+    
+    status_change = _changed(target, 'status')
+    if status_change is not None:
+        old, new = status_change
+        deltas[_status_key(old)] = deltas.get(_status_key(old), 0) - 1
+        deltas[_status_key(new)] = deltas.get(_status_key(new), 0) + 1
+    
+    score_change = _changed(target, 'ai_score')
+    if score_change is not None:
+        _add_priority_change(deltas, *(_priority(score) for score in score_change))
+    
+    adjust_lead_statistics(connection, deltas)
+
+
+@event.listens_for(Notification, 'after_insert')
+def _notification_inserted(mapper, connection, target):
+    if not target.is_read:
+        adjust_lead_statistics(connection, {UNREAD_KEY: 1})
+
+
+@event.listens_for(Notification, 'after_delete')
+def _notification_deleted(mapper, connection, target):
+    if not target.is_read:
+        adjust_lead_statistics(connection, {UNREAD_KEY: -1})
+
+
+@event.listens_for(Notification, 'after_update')
+def _notification_updated(mapper, connection, target):
+    change = _changed(target, 'is_read')
+    if change is not None and bool(change[0]) != bool(change[1]):
+        adjust_lead_statistics(connection, {UNREAD_KEY: -1 if change[1] else 1})
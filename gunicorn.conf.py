@@ -0,0 +1,31 @@
+"""
+Gunicorn Configuration
+Loads the app and AI model once in the master so workers share them copy-on-write
+"""
+import gc
+
+# Import the app (and warm the model) in the master before forking workers
+preload_app = True
+
+# Threaded workers: each open notification stream holds a thread, so keep
+# NOTIFICATION_STREAM_MAX_CLIENTS below the thread count
+worker_class = 'gthread'
+threads = 16
+
+
+def when_ready(server):
+    """Warm up the model in the master, then freeze it out of the GC."""
+    from ai import lead_scorer
+    lead_scorer.warm_up()
+    
+    # Objects that existed before the fork are never collected in workers, so
+    # keeping the GC from touching them keeps their pages shared
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master."""
+    from app import app
+    from database.db_instance import db
+    with app.app_context():
+        db.engine.dispose(close=False)
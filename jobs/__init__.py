@@ -0,0 +1,134 @@
+"""
+Background Job Runner
+Runs long tasks (batch scoring, reminders, reports) outside the request cycle
+"""
+import json
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from database.db_instance import db
+from database.models import Job
+
+
+class JobRunner:
+    """Thread-pool job runner whose job state lives in the database."""
+    
+    DEFAULT_WORKERS = 2
+    
+    def __init__(self):
+        self.app = None
+        self.executor = None
+    
+    def init_app(self, app):
+        """Bind the runner to a Flask app and start its worker pool."""
+        self.app = app
+        # Threads are spawned lazily on first submit, so this is fork-safe
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config.get('JOB_WORKERS', self.DEFAULT_WORKERS),
+            thread_name_prefix='job'
+        )
+        app.extensions['job_runner'] = self
+        
+        with app.app_context():
+            failed = self.fail_interrupted()
+        if failed:
+            print(f"⚠️ Marked {failed} interrupted jobs as failed")
+    
+    def fail_interrupted(self):
+        """
+        Fail jobs left queued or running by a process that has exited.
+        
+        Jobs only live in their process's thread pool, so nothing will ever
+        finish them. Jobs of live processes on this host (other workers, a
+        running web server seen from a CLI command) and of other hosts are
+        left alone.
+        
+        Returns:
+            int: Jobs marked as failed
+        """
+        host = socket.gethostname()
+        interrupted = [
+            job_id for job_id, runner in db.session.query(Job.id, Job.runner).filter(
+                Job.status.in_(['queued', 'running'])
+            )
+            if runner is None or (runner.rpartition(':')[0] == host and not _process_alive(runner))
+        ]
+        if interrupted:
+            db.session.execute(db.update(Job).where(Job.id.in_(interrupted)).values(
+                status='failed',
+                error='Interrupted: the process running this job exited before it finished',
+                finished_at=datetime.utcnow()
+            ))
+        db.session.commit()
+        return len(interrupted)
+    
+    def submit(self, kind):
+        """
+        Queue a job for background execution.
+        
+        Args:
+            kind: Task name registered in jobs.tasks.TASKS
+        
+        Returns:
+            Job: The persisted job row (status 'queued')
+        """
+        from jobs.tasks import TASKS
+        
+        if kind not in TASKS:
+            raise ValueError(f'Unknown job type: {kind}')
+        
+        job = Job(kind=kind, status='queued', runner=f'{socket.gethostname()}:{os.getpid()}')
+        db.session.add(job)
+        db.session.commit()
+        
+        self.executor.submit(self._run, job.id, TASKS[kind])
+        return job
+    
+    def _run(self, job_id, task):
+        """Execute a task inside an app context and record its outcome."""
+        with self.app.app_context():
+            self._update(job_id, status='running', started_at=datetime.utcnow())
+            
+            def progress(processed, total=None):
+                values = {'processed': processed}
+                if total is not None:
+                    values['total'] = total
+                self._update(job_id, **values)
+            
+            try:
+                result = task(progress)
+            except Exception as e:
+                db.session.rollback()
+                self._update(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+            else:
+                self._update(
+                    job_id,
+                    status='completed',
+                    result=json.dumps(result),
+                    finished_at=datetime.utcnow()
+                )
+    
+    def _update(self, job_id, **values):
+        """Write job fields in their own short transaction."""
+        db.session.execute(db.update(Job).where(Job.id == job_id).values(**values))
+        db.session.commit()
+
+
+def _process_alive(runner):
+    """Whether the process of a host:pid runner id (on this host) still exists."""
+    pid = int(runner.rpartition(':')[2])
+    if pid == os.getpid():
+        # Only a previous process can have left this process's pid behind
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Singleton instance
+job_runner = JobRunner()
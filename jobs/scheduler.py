@@ -0,0 +1,308 @@
+"""
+Follow-up Scheduler
+Emits follow-up reminders as leads fall due, from a min-heap of upcoming follow-ups
+"""
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import and_, event, inspect, or_
+from sqlalchemy.orm import Session, object_session
+from database.db_instance import db
+from database.models import Lead
+from database.notification_hub import notification_hub
+from jobs.tasks import FOLLOWUP_STATUSES, create_reminders
+
+# Upcoming follow-ups read from the index into the heap at a time
+LOAD_BATCH_SIZE = 1000
+
+# Due leads per reminder INSERT (and commit)
+EMIT_BATCH_SIZE = 500
+
+# The heap is rebuilt from the index this often, which picks up follow-ups
+# changed by other processes (changes made in this process apply at once)
+RESYNC_SECONDS = 60
+
+# Session.info key collecting lead changes until the transaction commits
+PENDING_KEY = 'followup_changes'
+
+
+class FollowUpScheduler:
+    """
+    Min-heap of (next_followup, lead id) for the leads still being followed up.
+    
+    The heap holds the earliest follow-ups only: batches are read in
+    (next_followup, id) order from the index and the next batch is read once
+    the heap runs dry. Entries are never removed in place; a lead's current
+    due date lives in a dict and heap entries that no longer match it are
+    skipped when popped. Reminders are emitted for due leads in batches, and
+    create_reminders re-checks every lead against the table, so a lead that
+    was edited or deleted since it was loaded gets no reminder.
+    """
+    
+    def __init__(self):
+        self.app = None
+        self._heap = []
+        self._scheduled = {}
+        # Key of the last follow-up read from the index; later ones are not in the heap
+        self._loaded_through = None
+        self._exhausted = False
+        # Follow-ups due on or before this date have been handled
+        self._handled_through = None
+        self._last_resync = None
+        # Wall-clock start of the last reload, for catching up on other processes' changes
+        self._synced_at = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def init_app(self, app):
+        """Bind the scheduler to a Flask app (it is only started explicitly)."""
+        self.app = app
+        app.extensions['followup_scheduler'] = self
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def __len__(self):
+        return len(self._scheduled)
+    
+    def start(self):
+        """Recover missed follow-ups, then emit reminders on a background thread."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='followup-scheduler', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def join(self):
+        """Block until the background thread exits."""
+        if self._thread is not None:
+            self._thread.join()
+    
+    def run_once(self):
+        """
+        Recover, emit everything due and return (for the CLI and tests).
+        
+        Returns:
+            dict: Reminders created and follow-ups left in the heap
+        """
+        created_count = self.recover()
+        created_count += self.run_pending()
+        return {'created_count': created_count, 'scheduled': len(self._scheduled)}
+    
+    def recover(self):
+        """
+        Catch up after downtime: remind every overdue lead, then reload the heap.
+        
+        Returns:
+            int: Reminders created
+        """
+        created_count = create_reminders()
+        db.session.commit()
+        if created_count:
+            notification_hub.publish_changed()
+        
+        self._handled_through = datetime.utcnow().date()
+        self.reload()
+        return created_count
+    
+    def reload(self):
+        """
+        Rebuild the heap from the index, starting after the handled follow-ups.
+        
+        Leads another process made due on or before the handled date are
+        never read into the heap, so leads updated since the previous reload
+        (with RESYNC_SECONDS of slack for late commits) get their reminders
+        here first; create_reminders skips leads that already have one.
+        
+        Returns:
+            int: Reminders created for those leads
+        """
+        synced_at = datetime.utcnow()
+        created_count = 0
+        if self._synced_at is not None:
+            created_count = create_reminders(
+                updated_since=self._synced_at - timedelta(seconds=RESYNC_SECONDS)
+            )
+            db.session.commit()
+            if created_count:
+                notification_hub.publish_changed()
+        self._synced_at = synced_at
+        
+        handled_through = self._handled_through or synced_at.date()
+        with self._lock:
+            self._heap = []
+            self._scheduled = {}
+            # Sorts after every (handled_through, id) key
+            self._loaded_through = (handled_through + timedelta(days=1), 0)
+            self._exhausted = False
+        self._load_more()
+        self._last_resync = time.monotonic()
+        return created_count
+    
+    def _load_more(self):
+        """Read the next batch of follow-ups (in due order) into the heap."""
+        due_date, lead_id = self._loaded_through
+        rows = db.session.query(Lead.next_followup, Lead.id).filter(
+            Lead.status.in_(FOLLOWUP_STATUSES),
+            or_(
+                Lead.next_followup > due_date,
+                and_(Lead.next_followup == due_date, Lead.id > lead_id)
+            )
+        ).order_by(Lead.next_followup, Lead.id).limit(LOAD_BATCH_SIZE).all()
+        
+        with self._lock:
+            for due_date, lead_id in rows:
+                self._scheduled[lead_id] = due_date
+                heapq.heappush(self._heap, (due_date, lead_id))
+            if rows:
+                self._loaded_through = tuple(rows[-1])
+            self._exhausted = len(rows) < LOAD_BATCH_SIZE
+    
+    def run_pending(self):
+        """
+        Emit reminders for every follow-up due today or earlier.
+        
+        Returns:
+            int: Reminders created
+        """
+        today = datetime.utcnow().date()
+        created_count = 0
+        
+        while True:
+            due = self._pop_due(today)
+            for start in range(0, len(due), EMIT_BATCH_SIZE):
+                created_count += create_reminders(due[start:start + EMIT_BATCH_SIZE])
+                db.session.commit()
+            
+            with self._lock:
+                drained = not self._heap and not self._exhausted
+            if not drained:
+                break
+            self._load_more()
+        
+        with self._lock:
+            self._handled_through = max(self._handled_through or today, today)
+        if created_count:
+            notification_hub.publish_changed()
+        return created_count
+    
+    def _pop_due(self, today):
+        """Pop the lead ids whose current follow-up date is today or earlier."""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= today:
+                due_date, lead_id = heapq.heappop(self._heap)
+                # Skip entries superseded by a later change to the lead
+                if self._scheduled.get(lead_id) == due_date:
+                    del self._scheduled[lead_id]
+                    due.append(lead_id)
+        return due
+    
+    def track(self, changes):
+        """
+        Apply committed lead changes to the heap.
+        
+        Args:
+            changes: (lead id, next_followup, status) tuples; next_followup
+                is None for deleted leads
+        """
+        with self._lock:
+            # Not loaded yet: the first reload reads these leads from the index
+            if self._loaded_through is None:
+                return
+            earliest = self._heap[0][0] if self._heap else None
+            for lead_id, due_date, status in changes:
+                self._scheduled.pop(lead_id, None)
+                if due_date is None or status not in FOLLOWUP_STATUSES:
+                    continue
+                # Follow-ups past the loaded batch are read from the index later
+                if not self._exhausted and (due_date, lead_id) > self._loaded_through:
+                    continue
+                self._scheduled[lead_id] = due_date
+                heapq.heappush(self._heap, (due_date, lead_id))
+            
+            if self._heap and (earliest is None or self._heap[0][0] < earliest):
+                self._wakeup.set()
+    
+    def _seconds_until_next(self):
+        """Sleep until the next follow-up falls due or the next resync, whichever is first."""
+        seconds = RESYNC_SECONDS - (time.monotonic() - self._last_resync)
+        with self._lock:
+            if self._heap:
+                due_at = datetime.combine(self._heap[0][0], datetime.min.time())
+                seconds = min(seconds, (due_at - datetime.utcnow()).total_seconds())
+        return max(seconds, 0)
+    
+    def _run(self):
+        """Scheduler thread: recover once, then emit as follow-ups fall due."""
+        recovered = False
+        while not self._stop.is_set():
+            timeout = RESYNC_SECONDS
+            try:
+                with self.app.app_context():
+                    if not recovered:
+                        created_count = self.recover()
+                        recovered = True
+                        print(f"⏰ Follow-up scheduler started ({created_count} overdue reminders, {len(self)} upcoming)")
+                    elif time.monotonic() - self._last_resync >= RESYNC_SECONDS:
+                        self.reload()
+                    self.run_pending()
+                timeout = self._seconds_until_next()
+            except Exception as e:
+                # Retry after RESYNC_SECONDS rather than spinning on a failing database
+                print(f"⚠️ Follow-up scheduler error: {e}")
+            
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+
+# Singleton instance
+followup_scheduler = FollowUpScheduler()
+
+
+def _queue_change(target, due_date, status):
+    """Hold a lead change on its session until the transaction commits."""
+    session = object_session(target)
+    if session is not None and followup_scheduler.running:
+        session.info.setdefault(PENDING_KEY, []).append((target.id, due_date, status))
+
+
+@event.listens_for(Lead, 'after_insert')
+def _lead_inserted(mapper, connection, target):
+    _queue_change(target, target.next_followup, target.status)
+
+
+@event.listens_for(Lead, 'after_update')
+def _lead_updated(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.next_followup.history.has_changes() or state.attrs.status.history.has_changes():
+        _queue_change(target, target.next_followup, target.status)
+
+
+@event.listens_for(Lead, 'after_delete')
+def _lead_deleted(mapper, connection, target):
+    _queue_change(target, None, None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    changes = session.info.pop(PENDING_KEY, None)
+    if changes:
+        followup_scheduler.track(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _session_rolled_back(session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,107 @@
+"""
+Background Job Tasks
+Units of work the job runner can execute; each takes a progress callback
+"""
+from datetime import datetime
+from sqlalchemy import func, literal
+from database.models import Lead, Notification
+from database.db_instance import db
+from database.statistics import UNREAD_KEY, adjust_lead_statistics
+from database.notification_hub import notification_hub
+from ai import lead_scorer
+from ai.recommendation import recommendation_engine
+
+
+def batch_score(progress):
+    """Re-score leads whose features or model changed, reporting progress per committed page."""
+    progress(0, Lead.query.count())
+    model_version = lead_scorer.model_version
+    counts = lead_scorer.score_all_leads(
+        progress_callback=lambda processed, changed: progress(processed)
+    )
+    return {**counts, 'model_version': model_version}
+
+
+# Lead statuses that still get follow-up reminders
+FOLLOWUP_STATUSES = ('new', 'qualified')
+
+
+def create_reminders(lead_ids=None, updated_since=None):
+    """
+    Insert follow-up reminders for due leads that have no unread one.
+    
+    One INSERT ... SELECT ... WHERE NOT EXISTS adds a reminder for every due
+    lead without an unread one, so the round trips do not grow with the
+    number of leads and running it twice creates nothing new. The caller
+    commits.
+    
+    Args:
+        lead_ids: Only consider these leads (None = every due lead)
+        updated_since: Only consider leads updated at or after this time
+    
+    Returns:
+        int: Number of reminders created
+    """
+    today = datetime.utcnow().date()
+    
+    has_unread_reminder = db.session.query(Notification.id).filter(
+        Notification.lead_id == Lead.id,
+        Notification.type == 'reminder',
+        Notification.is_read == False
+    ).exists()
+    
+    due_leads = db.select(
+        Lead.id,
+        literal('reminder'),
+        literal('Follow-up Reminder: ') + Lead.name,
+        literal("It's time to follow up with ") + Lead.name
+            + literal(' from ') + func.coalesce(Lead.company, ''),
+        literal('normal'),
+        literal(False),
+        literal(datetime.utcnow())
+    ).where(
+        Lead.next_followup <= today,
+        Lead.status.in_(FOLLOWUP_STATUSES),
+        ~has_unread_reminder
+    )
+    if lead_ids is not None:
+        due_leads = due_leads.where(Lead.id.in_(lead_ids))
+    if updated_since is not None:
+        due_leads = due_leads.where(Lead.updated_at >= updated_since)
+    
+    table = Notification.__table__
+    result = db.session.execute(table.insert().from_select(
+        ['lead_id', 'type', 'title', 'message', 'priority', 'is_read', 'created_at'],
+        due_leads
+    ))
+    created_count = result.rowcount
+    
+    # Bulk insert bypasses the ORM events that maintain the unread counter
+    adjust_lead_statistics(db.session.connection(), {UNREAD_KEY: created_count})
+    return created_count
+
+
+def generate_reminders(progress):
+    """Create follow-up reminders for every lead that is due."""
+    created_count = create_reminders()
+    db.session.commit()
+    if created_count:
+        notification_hub.publish_changed()
+    
+    progress(created_count, created_count)
+    return {'created_count': created_count}
+
+
+def build_report(progress):
+    """Build the recommendation summary report."""
+    report = recommendation_engine.generate_report()
+    progress(report['total_leads'], report['total_leads'])
+    return report
+
+
+# Registry of job kinds accepted by JobRunner.submit
+TASKS = {
+    'batch_score': batch_score,
+    'reminders': generate_reminders,
+    'report': build_report
+}
@@ -3,8 +3,9 @@ Chatbot Routes
 AI-powered help assistant for the sales agent
 """
 from flask import Blueprint, request, jsonify, session
-from database.models import Lead
-from database.db_instance import db
+from database.pipeline_cache import pipeline_cache
+from ai.keyword_matcher import KeywordMatcher
+from ai.retrieval import load_index
 from functools import wraps
 
 chatbot_bp = Blueprint('chatbot', __name__)
@@ -58,22 +59,82 @@ CHATBOT_RESPONSES = {
     }
 }
 
+# All keywords compiled once; categories keep their order of priority above
+response_matcher = KeywordMatcher(
+    (key, data['keywords']) for key, data in CHATBOT_RESPONSES.items() if key != 'default'
+)
+
+# TF-IDF index over keywords and responses, for questions no keyword matches
+response_index = load_index('chatbot', [
+    (key, ' '.join(data['keywords'] + [data['response']]))
+    for key, data in CHATBOT_RESPONSES.items() if key != 'default'
+])
+
+# Questions answered from live pipeline data (checked before the static answers)
+LIVE_INTENTS = {
+    'top_leads': ['top leads', 'best leads', 'hottest leads', 'hot leads', 'top prospects'],
+    'followups_due': ['overdue', 'follow-ups due', 'followups due', 'follow ups due', 'due today', 'due follow'],
+    'pipeline_summary': ['pipeline', 'how many leads', 'lead count', 'my numbers', 'summary'],
+}
+
+live_matcher = KeywordMatcher(LIVE_INTENTS.items())
+
+
+def live_response(intent, snapshot):
+    """
+    Answer a live-data intent from a pipeline snapshot.
+    
+    Args:
+        intent: Key of LIVE_INTENTS
+        snapshot: PipelineSnapshot from the pipeline cache
+    
+    Returns:
+        str: Chatbot response
+    """
+    as_of = f"\n\n_As of {snapshot.taken_at.strftime('%H:%M:%S')} UTC_"
+    
+    if intent == 'top_leads':
+        if not snapshot.top_leads:
+            return '🔥 **Top Leads**\n\nNo open leads right now. Add a lead to get started! ➕' + as_of
+        lines = [
+            f"{rank}. **{lead['name']}**{' (' + lead['company'] + ')' if lead['company'] else ''} - "
+            f"score {lead['ai_score']}, {lead['status']}"
+            for rank, lead in enumerate(snapshot.top_leads, start=1)
+        ]
+        return '🔥 **Top Leads Today**\n\n' + '\n'.join(lines) + '\n\nContact the top of the list first! 📞' + as_of
+    
+    if intent == 'followups_due':
+        return (
+            f"⏰ **Follow-ups**\n\n"
+            f"⚠️ **Overdue:** {snapshot.overdue_followups}\n"
+            f"📅 **Due today:** {snapshot.followups_due_today}\n\n"
+            f"Check the Notifications tab for the reminders. 🔔" + as_of
+        )
+    
+    stats = snapshot.statistics
+    status_lines = '\n'.join(
+        f"- {status.title()}: {count}" for status, count in sorted(stats.status_counts.items())
+    )
+    return (
+        f"📊 **Pipeline Summary**\n\n"
+        f"👥 **Total leads:** {stats.total_leads}\n"
+        f"🔥 High priority: {stats.high_priority}\n"
+        f"⚡ Medium priority: {stats.medium_priority}\n"
+        f"📉 Low priority: {stats.low_priority}\n\n"
+        f"**By status:**\n{status_lines or '- No leads yet'}" + as_of
+    )
+
+
 def find_best_response(user_input):
     """Find the best matching response based on user input."""
-    user_input_lower = user_input.lower().strip()
+    intent = live_matcher.match(user_input)
+    if intent is not None:
+        return live_response(intent, pipeline_cache.get())
     
-    # Check each keyword category
-    for key, data in CHATBOT_RESPONSES.items():
-        if key == 'default':
-            continue
-        
-        # Check if any keyword matches
-        for keyword in data['keywords']:
-            if keyword.lower() in user_input_lower:
-                return data['response']
+    category = response_matcher.match(user_input) or response_index.best_match(user_input)
     
     # If no match found, return default response
-    return CHATBOT_RESPONSES['default']['response']
+    return CHATBOT_RESPONSES[category or 'default']['response']
 
 @chatbot_bp.route('/api/message', methods=['POST'])
 @login_required
@@ -104,15 +165,13 @@ def chat_message():
 def chatbot_stats():
     """Get dashboard stats for chatbot context."""
     try:
-        total_leads = Lead.query.count()
-        high_priority = Lead.query.filter(Lead.ai_score >= 70).count()
-        medium_priority = Lead.query.filter(Lead.ai_score >= 40, Lead.ai_score < 70).count()
+        stats = pipeline_cache.get().statistics
         
         return jsonify({
-            'total_leads': total_leads,
-            'high_priority': high_priority,
-            'medium_priority': medium_priority,
-            'low_priority': total_leads - high_priority - medium_priority
+            'total_leads': stats.total_leads,
+            'high_priority': stats.high_priority,
+            'medium_priority': stats.medium_priority,
+            'low_priority': stats.low_priority
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2,12 +2,13 @@
 Dashboard Routes
 Main dashboard with analytics and overview
 """
-from flask import Blueprint, render_template, jsonify, redirect, url_for, session
-from database.models import Lead, Notification
-from database.db_instance import db
+from flask import Blueprint, render_template, jsonify, redirect, url_for, session, request
+from database.models import Lead, Job, User
 from ai import lead_scorer
 from ai.recommendation import recommendation_engine
-from sqlalchemy import func
+from database.statistics import get_lead_statistics
+from database.loading import NO_RELATIONSHIPS
+from database import inbox
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -25,87 +26,67 @@ def login_required(f):
 @login_required
 def index():
     """Main dashboard view."""
-    # Get lead statistics
-    total_leads = Lead.query.count()
-    
-    # Status counts
-    status_counts = db.session.query(
-        Lead.status, func.count(Lead.id)
-    ).group_by(Lead.status).all()
-    status_dict = {status: count for status, count in status_counts}
-    
-    # Priority counts
-    high_priority = Lead.query.filter(Lead.ai_score >= 70).count()
-    medium_priority = Lead.query.filter(
-        Lead.ai_score >= 40, Lead.ai_score < 70
-    ).count()
-    low_priority = Lead.query.filter(Lead.ai_score < 40).count()
+    # Lead statistics (maintained counters)
+    stats = get_lead_statistics()
     
     # Recent leads
-    recent_leads = Lead.query.order_by(Lead.created_at.desc()).limit(5).all()
+    recent_leads = Lead.query.options(*NO_RELATIONSHIPS).order_by(Lead.created_at.desc()).limit(5).all()
     
     # High priority leads
-    top_leads = Lead.query.filter(Lead.ai_score >= 70).order_by(
+    top_leads = Lead.query.options(*NO_RELATIONSHIPS).filter(Lead.ai_score >= 70).order_by(
         Lead.ai_score.desc()
     ).limit(5).all()
     
-    # Unread notifications
-    unread_notifications = Notification.query.filter(
-        Notification.is_read == False
-    ).order_by(Notification.created_at.desc()).limit(5).all()
+    # Unread notifications (past the user's read cursor)
+    unread_notifications, _ = inbox.inbox_page(
+        User.query.get_or_404(session['user_id']), unread_only=True, limit=5, options=NO_RELATIONSHIPS
+    )
     
-    # Recommendation summary
-    recommendations = recommendation_engine.get_bulk_recommendations()
+    # Recommendation summary (count only; nothing is evaluated here)
+    recommendation_count = recommendation_engine.count_pending()
+    
+    # Background jobs still in progress
+    active_jobs = Job.query.filter(
+        Job.status.in_(['queued', 'running'])
+    ).order_by(Job.created_at.desc()).all()
     
     return render_template(
         'dashboard.html',
         title='Dashboard - AI Sales Agent',
-        total_leads=total_leads,
-        status_counts=status_dict,
-        high_priority=high_priority,
-        medium_priority=medium_priority,
-        low_priority=low_priority,
+        total_leads=stats.total_leads,
+        status_counts=stats.status_counts,
+        high_priority=stats.high_priority,
+        medium_priority=stats.medium_priority,
+        low_priority=stats.low_priority,
         recent_leads=recent_leads,
         top_leads=top_leads,
         notifications=unread_notifications,
-        recommendation_count=len(recommendations)
+        recommendation_count=recommendation_count,
+        active_jobs=active_jobs
     )
 
 @dashboard_bp.route('/api/stats')
 def api_stats():
     """API endpoint for dashboard statistics."""
-    total_leads = Lead.query.count()
-    
-    status_counts = db.session.query(
-        Lead.status, func.count(Lead.id)
-    ).group_by(Lead.status).all()
-    
-    high_priority = Lead.query.filter(Lead.ai_score >= 70).count()
-    medium_priority = Lead.query.filter(
-        Lead.ai_score >= 40, Lead.ai_score < 70
-    ).count()
-    low_priority = Lead.query.filter(Lead.ai_score < 40).count()
-    
-    unread_notifications = Notification.query.filter(
-        Notification.is_read == False
-    ).count()
-    
-    return jsonify({
-        'total_leads': total_leads,
-        'status_counts': dict(status_counts),
-        'priority_counts': {
-            'high': high_priority,
-            'medium': medium_priority,
-            'low': low_priority
-        },
-        'unread_notifications': unread_notifications
-    })
+    return jsonify(get_lead_statistics().to_dict())
 
 @dashboard_bp.route('/api/recommendations')
 def api_recommendations():
-    """API endpoint for recommendations."""
-    recommendations = recommendation_engine.get_bulk_recommendations()
-    return jsonify(recommendations)
+    """
+    API endpoint for recommendations, one page at a time.
+    
+    Query params: cursor (next_cursor from the previous page) and limit.
+    """
+    cursor = request.args.get('cursor', 0, type=int)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    page = recommendation_engine.get_recommendations_page(after_id=cursor, limit=limit)
+    page['total'] = recommendation_engine.count_pending()
+    return jsonify(page)
+
+@dashboard_bp.route('/api/recommendations/count')
+def api_recommendations_count():
+    """API endpoint for the number of leads awaiting a recommendation."""
+    return jsonify({'count': recommendation_engine.count_pending()})
 
 @dashboard_bp.route('/api/report')
 def api_report():
@@ -2,9 +2,12 @@
 Help Assistant / Recommendation Chatbot Routes
 Focused chatbot for Call, Email, Follow-up, and Manage actions
 """
+import random
 from flask import Blueprint, request, jsonify, session, render_template
 from database.models import Lead, Notification
 from database.db_instance import db
+from ai.keyword_matcher import KeywordMatcher
+from ai.retrieval import load_index
 from functools import wraps
 
 help_assistant_bp = Blueprint('help_assistant', __name__)
@@ -79,9 +82,24 @@ HELP_RESPONSES = {
 }
 
 
+# All keywords compiled once; categories keep their order of priority above
+help_matcher = KeywordMatcher((category, data['keywords']) for category, data in HELP_RESPONSES.items())
+
+# TF-IDF index over keywords and responses, for questions no keyword matches
+help_index = load_index('help', [
+    (category, ' '.join(data['keywords'] + data['responses']))
+    for category, data in HELP_RESPONSES.items()
+])
+
+# Default responses if no match
+DEFAULT_RESPONSES = [
+    '🤔 I can help with:\n\n📞 **Call** - How to contact leads\n📧 **Email** - Sending messages\n⏰ **Follow-up** - Schedule reminders\n📋 **Manage** - Organize leads\n💡 **Recommendation** - Get suggestions\n\nWhat would you like to know? 😊',
+    '💬 Try asking about:\n\n"How to call a lead?"\n"How to send email?"\n"Set a follow-up"\n"Manage my leads"\n"What do you recommend?"\n\nI\'m here to help! 👋'
+]
+
+
 def get_random_response(category):
     """Get a response from the category."""
-    import random
     if category in HELP_RESPONSES:
         responses = HELP_RESPONSES[category]['responses']
         return random.choice(responses)
@@ -89,22 +107,10 @@ def get_random_response(category):
 
 def find_best_response(user_message):
     """Find best matching response based on keywords."""
-    message = user_message.lower().strip()
-    
-    # Check each category
-    for category, data in HELP_RESPONSES.items():
-        keywords = data['keywords']
-        for keyword in keywords:
-            if keyword in message:
-                return get_random_response(category)
-    
-    # Default responses if no match
-    defaults = [
-        '🤔 I can help with:\n\n📞 **Call** - How to contact leads\n📧 **Email** - Sending messages\n⏰ **Follow-up** - Schedule reminders\n📋 **Manage** - Organize leads\n💡 **Recommendation** - Get suggestions\n\nWhat would you like to know? 😊',
-        '💬 Try asking about:\n\n"How to call a lead?"\n"How to send email?"\n"Set a follow-up"\n"Manage my leads"\n"What do you recommend?"\n\nI\'m here to help! 👋'
-    ]
-    import random
-    return random.choice(defaults)
+    category = help_matcher.match(user_message) or help_index.best_match(user_message)
+    if category is not None:
+        return get_random_response(category)
+    return random.choice(DEFAULT_RESPONSES)
 
 @help_assistant_bp.route('/api/message', methods=['POST'])
 @login_required
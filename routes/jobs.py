@@ -0,0 +1,46 @@
+"""
+Background Job Routes
+Submit long-running jobs and poll their progress
+"""
+from flask import Blueprint, jsonify, session
+from database.models import Job
+from jobs import job_runner
+from jobs.tasks import TASKS
+from functools import wraps
+
+jobs_bp = Blueprint('jobs', __name__)
+
+def login_required(f):
+    """Decorator to require login."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({'error': 'Unauthorized'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+@jobs_bp.route('/submit/<kind>', methods=['POST'])
+@login_required
+def submit(kind):
+    """Queue a background job and return its initial state."""
+    if kind not in TASKS:
+        return jsonify({'error': f'Unknown job type: {kind}'}), 400
+    
+    job = job_runner.submit(kind)
+    return jsonify(job.to_dict()), 202
+
+@jobs_bp.route('/<int:id>')
+@login_required
+def status(id):
+    """Report job progress, throughput (leads/sec) and ETA."""
+    job = Job.query.get_or_404(id)
+    return jsonify(job.to_dict())
+
+@jobs_bp.route('/active')
+@login_required
+def active():
+    """List queued and running jobs."""
+    jobs = Job.query.filter(
+        Job.status.in_(['queued', 'running'])
+    ).order_by(Job.created_at.desc()).all()
+    return jsonify([job.to_dict() for job in jobs])
@@ -5,10 +5,16 @@ Handles all lead CRUD operations and AI scoring
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session
 from database.models import Lead
 from database.db_instance import db
+from database.statistics import get_lead_statistics
+from database.lead_import import LEAD_SOURCES, import_leads
+from database.lead_batch import LEAD_STATUSES, apply_batch_action
+from database.loading import LEAD_WITH_NOTIFICATIONS, NO_RELATIONSHIPS, query_budget
 from ai import lead_scorer
 from ai.recommendation import recommendation_engine
+from jobs import job_runner
 from datetime import datetime, timedelta
 from functools import wraps
+from sqlalchemy import and_, or_
 
 leads_bp = Blueprint('leads', __name__)
 
@@ -21,12 +27,157 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Leads per page on the listing (and the max a client may ask for)
+LEADS_PAGE_SIZE = 50
+MAX_LEADS_PAGE_SIZE = 200
+
+def _lead_filters(args):
+    """Read the listing filters (priority, status, source, q) from query args."""
+    return {
+        'priority': args.get('priority', 'all'),
+        'status': args.get('status', 'all'),
+        'source': args.get('source', 'all'),
+        'q': args.get('q', '').strip()
+    }
+
+# Allowed values of each listing filter, for requests that must not fall
+# back to "all" on a typo (batch actions)
+FILTER_CHOICES = {
+    'priority': ('all', 'high', 'medium', 'low'),
+    'status': ('all',) + LEAD_STATUSES,
+    'source': ('all',) + LEAD_SOURCES,
+}
+
+def _validated_filters(raw):
+    """
+    Strictly parse listing filters sent as JSON.
+    
+    Args:
+        raw: Dict with any of priority, status, source and q
+    
+    Returns:
+        dict: Normalized filters
+    
+    Raises:
+        ValueError: On an unknown key or value
+    """
+    if not isinstance(raw, dict):
+        raise ValueError('filters must be an object')
+    unknown = set(raw) - set(FILTER_CHOICES) - {'q'}
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(map(str, unknown)))}")
+    
+    filters = _lead_filters({})
+    for key, choices in FILTER_CHOICES.items():
+        if key in raw:
+            if raw[key] not in choices:
+                raise ValueError(f"Invalid {key} filter: {raw[key]!r}")
+            filters[key] = raw[key]
+    if 'q' in raw:
+        if not isinstance(raw['q'], str):
+            raise ValueError('q filter must be a string')
+        filters['q'] = raw['q'].strip()
+    return filters
+
+def _filtered_leads_query(filters):
+    """Build the lead query for the given filters."""
+    query = Lead.query
+    
+    if filters['priority'] == 'high':
+        query = query.filter(Lead.ai_score >= 70)
+    elif filters['priority'] == 'medium':
+        query = query.filter(Lead.ai_score >= 40, Lead.ai_score < 70)
+    elif filters['priority'] == 'low':
+        query = query.filter(Lead.ai_score < 40)
+    
+    if filters['status'] != 'all':
+        query = query.filter(Lead.status == filters['status'])
+    
+    if filters['source'] != 'all':
+        query = query.filter(Lead.source == filters['source'])
+    
+    if filters['q']:
+        pattern = f"%{filters['q']}%"
+        query = query.filter(or_(
+            Lead.name.ilike(pattern),
+            Lead.email.ilike(pattern),
+            Lead.company.ilike(pattern)
+        ))
+    
+    return query
+
+def _parse_cursor(cursor):
+    """Split a 'score:id' cursor; returns None for a missing or bad cursor."""
+    try:
+        score, lead_id = cursor.split(':')
+        return int(score), int(lead_id)
+    except (AttributeError, ValueError):
+        return None
+
+def _leads_page(filters, cursor=None, limit=LEADS_PAGE_SIZE):
+    """
+    Fetch one page of leads ordered by (ai_score DESC, id ASC).
+    
+    Pages are keyed on the last row's (ai_score, id), so deep pages cost
+    the same as the first one.
+    
+    Returns:
+        tuple: (leads, next_cursor) where next_cursor is None on the last page
+    """
+    query = _filtered_leads_query(filters).options(*NO_RELATIONSHIPS)
+    
+    position = _parse_cursor(cursor)
+    if position is not None:
+        score, lead_id = position
+        query = query.filter(or_(
+            Lead.ai_score < score,
+            and_(Lead.ai_score == score, Lead.id > lead_id)
+        ))
+    
+    leads = query.order_by(Lead.ai_score.desc(), Lead.id).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(leads) > limit:
+        leads = leads[:limit]
+        next_cursor = f'{leads[-1].ai_score}:{leads[-1].id}'
+    
+    return leads, next_cursor
+
+def _count_leads(filters):
+    """Count leads matching the filters (counter lookup when unfiltered)."""
+    if filters == _lead_filters({}):
+        return get_lead_statistics().total_leads
+    return _filtered_leads_query(filters).order_by(None).count()
+
 @leads_bp.route('/')
 @login_required
 def index():
-    """List all leads."""
-    leads = Lead.query.order_by(Lead.ai_score.desc()).all()
-    return render_template('leads.html', leads=leads, title='Lead Management')
+    """List leads, filtered and paginated on the server."""
+    filters = _lead_filters(request.args)
+    leads, next_cursor = _leads_page(filters, request.args.get('cursor'))
+    
+    return render_template(
+        'leads.html',
+        leads=leads,
+        filters=filters,
+        next_cursor=next_cursor,
+        total_count=_count_leads(filters),
+        title='Lead Management'
+    )
+
+@leads_bp.route('/api/leads')
+@login_required
+def api_list_leads():
+    """API endpoint for one page of filtered leads (used by 'Load more')."""
+    filters = _lead_filters(request.args)
+    limit = min(max(request.args.get('limit', LEADS_PAGE_SIZE, type=int), 1), MAX_LEADS_PAGE_SIZE)
+    leads, next_cursor = _leads_page(filters, request.args.get('cursor'), limit)
+    
+    return jsonify({
+        'leads': [lead.to_dict() for lead in leads],
+        'rows_html': render_template('_lead_rows.html', leads=leads),
+        'next_cursor': next_cursor
+    })
 
 @leads_bp.route('/add', methods=['GET', 'POST'])
 @login_required
@@ -75,7 +226,7 @@ def add_lead():
             db.session.commit()
             
             # AI Scoring
-            lead.ai_score = lead_scorer.score_lead(lead)
+            lead_scorer.refresh_score(lead)
             
             # Get recommendation
             recommendation = recommendation_engine.get_recommendation(lead)
@@ -93,7 +244,7 @@ def add_lead():
             
             flash(f'✅ Lead {lead.name} added successfully! AI Score: {lead.ai_score}/100', 'success')
             return redirect(url_for('leads.index'))
-            
+        
         except ValueError as e:
             flash(f'Invalid input: Please check your form fields', 'error')
             db.session.rollback()
@@ -124,8 +275,8 @@ def edit_lead(id):
             lead.timeline = request.form.get('timeline', 'unknown')
             lead.status = request.form.get('status', 'new')
             
-            # Re-score with AI
-            lead.ai_score = lead_scorer.score_lead(lead)
+            # Re-score with AI (skipped when no scoring feature changed)
+            lead_scorer.refresh_score(lead)
             
             # Get new recommendation
             recommendation = recommendation_engine.get_recommendation(lead)
@@ -135,7 +286,7 @@ def edit_lead(id):
             
             flash(f'Lead {lead.name} updated successfully!', 'success')
             return redirect(url_for('leads.index'))
-            
+        
         except Exception as e:
             flash(f'Error updating lead: {str(e)}', 'error')
             db.session.rollback()
@@ -162,7 +313,7 @@ def delete_lead(id):
 @login_required
 def view_lead(id):
     """View lead details."""
-    lead = Lead.query.get_or_404(id)
+    lead = Lead.query.options(*LEAD_WITH_NOTIFICATIONS).get_or_404(id)
     return render_template('lead_detail.html', lead=lead, title='Lead Details')
 
 @leads_bp.route('/score/<int:id>')
@@ -171,13 +322,16 @@ def rescore_lead(id):
     """Re-score a lead with AI."""
     lead = Lead.query.get_or_404(id)
     
-    lead.ai_score = lead_scorer.score_lead(lead)
+    rescored = lead_scorer.refresh_score(lead)
     recommendation = recommendation_engine.get_recommendation(lead)
     lead.recommended_action = recommendation['action']
     
     db.session.commit()
     
-    flash(f'Lead {lead.name} re-scored. New score: {lead.ai_score}', 'info')
+    if rescored:
+        flash(f'Lead {lead.name} re-scored. New score: {lead.ai_score} (model {lead.score_model_version})', 'info')
+    else:
+        flash(f'Lead {lead.name} is up to date. Score: {lead.ai_score} (model {lead.score_model_version})', 'info')
     return redirect(url_for('leads.index'))
 
 @leads_bp.route('/status/<int:id>/<status>')
@@ -201,20 +355,86 @@ def api_get_lead(id):
 def api_score_lead(id):
     """API endpoint to score a lead."""
     lead = Lead.query.get_or_404(id)
-    score = lead_scorer.score_lead(lead)
+    score, model_version = lead_scorer.score_lead_with_version(lead)
     recommendation = recommendation_engine.get_recommendation(lead)
     
     return jsonify({
         'lead_id': id,
         'ai_score': score,
+        'model_version': model_version,
         'recommendation': recommendation
     })
 
 @leads_bp.route('/batch-score')
 @login_required
 def batch_score():
-    """Score all leads with AI."""
-    count = lead_scorer.score_all_leads()
-    flash(f'{count} leads scored successfully!', 'success')
-    return redirect(url_for('leads.index'))
+    """Queue a background job to re-score all leads with AI."""
+    job_runner.submit('batch_score')
+    flash('🔄 Re-scoring all leads in the background. Progress is shown on the dashboard.', 'info')
+    return redirect(url_for('dashboard.index'))
+
+@leads_bp.route('/batch-action', methods=['POST'])
+@login_required
+@query_budget(None)
+def batch_action():
+    """
+    Apply one action to many leads in a single transaction.
+    
+    Expects JSON with 'action' ('status', 'delete' or 'rescore'), 'status'
+    for the status action, and either 'lead_ids' or 'filters' (the listing
+    filters: priority, status, source, q) to select the leads.
+    """
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    
+    if 'filters' in data:
+        try:
+            filters = _validated_filters(data['filters'] or {})
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        if filters == _lead_filters({}):
+            return jsonify({'success': False, 'message': 'Filters must narrow down the leads'}), 400
+        criterion = Lead.id.in_(_filtered_leads_query(filters).with_entities(Lead.id).order_by(None))
+    else:
+        try:
+            lead_ids = {int(lead_id) for lead_id in data.get('lead_ids') or []}
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'lead_ids must be a list of ids'}), 400
+        if not lead_ids:
+            return jsonify({'success': False, 'message': 'No leads selected'}), 400
+        criterion = Lead.id.in_(lead_ids)
+    
+    try:
+        result = apply_batch_action(criterion, action, data.get('status'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Batch action failed: {str(e)}'}), 500
+    
+    if action == 'delete':
+        message = f"Deleted {result['affected']} leads"
+    elif action == 'status':
+        message = f"Updated {result['affected']} leads to {data['status']}"
+    else:
+        message = f"Re-scored {result['rescored']} of {result['affected']} leads ({result['changed']} scores changed)"
+    return jsonify({'success': True, 'message': message, **result})
 
+@leads_bp.route('/import-csv', methods=['POST'])
+@login_required
+@query_budget(None)
+def import_csv():
+    """Import leads from an uploaded CSV or JSONL file."""
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'success': False, 'message': 'No file uploaded'}), 400
+    
+    try:
+        report = import_leads(upload.stream, upload.filename)
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'File must be UTF-8 encoded'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Import failed: {str(e)}'}), 500
+    
+    return jsonify({'success': True, **report})
@@ -2,14 +2,27 @@
 Notification Routes
 Handles notifications and reminders
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session
-from database.models import Notification, Lead
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session, current_app, Response
+from database.models import Notification, User
 from database.db_instance import db
-from datetime import datetime, timedelta
+from database.loading import NOTIFICATIONS_WITH_LEAD, NO_RELATIONSHIPS
+from database.notification_hub import notification_hub
+from database import inbox
+from jobs import job_runner
 from functools import wraps
+import json
+import queue
+import time
 
 notifications_bp = Blueprint('notifications', __name__)
 
+# Event stream timing: comment lines keep proxies from closing an idle
+# stream (and let it catch up on changes made by other worker processes);
+# streams end after STREAM_MAX_SECONDS and the browser reconnects
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_MAX_SECONDS = 300
+STREAM_RETRY_MS = 3000
+
 def login_required(f):
     """Decorator to require login."""
     @wraps(f)
@@ -19,33 +32,46 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-@notifications_bp.route('/')
-@login_required
-def index():
-    """List all notifications."""
-    notifications = Notification.query.order_by(
-        Notification.created_at.desc()
-    ).all()
+def _current_user():
+    """The logged-in user (their read cursor scopes the inbox)."""
+    return User.query.get_or_404(session['user_id'])
+
+def _wants_json():
+    """Whether the request came from main.js (fetch with X-Requested-With)."""
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+def _render_inbox(unread_only, title):
+    """Render one page of the current user's inbox."""
+    user = _current_user()
+    notifications, next_cursor = inbox.inbox_page(
+        user,
+        unread_only=unread_only,
+        before_id=request.args.get('cursor', type=int),
+        options=NOTIFICATIONS_WITH_LEAD
+    )
     
     return render_template(
         'notifications.html',
         notifications=notifications,
-        title='Notifications'
+        next_cursor=next_cursor,
+        read_through=inbox.read_through(user),
+        unread_count=inbox.unread_count(user),
+        unread_cap=inbox.UNREAD_COUNT_CAP,
+        unread_only=unread_only,
+        title=title
     )
 
+@notifications_bp.route('/')
+@login_required
+def index():
+    """List notifications, newest first, one page at a time."""
+    return _render_inbox(unread_only=False, title='Notifications')
+
 @notifications_bp.route('/unread')
 @login_required
 def unread():
-    """Show only unread notifications."""
-    notifications = Notification.query.filter(
-        Notification.is_read == False
-    ).order_by(Notification.created_at.desc()).all()
-    
-    return render_template(
-        'notifications.html',
-        notifications=notifications,
-        title='Unread Notifications'
-    )
+    """Show only unread notifications, one page at a time."""
+    return _render_inbox(unread_only=True, title='Unread Notifications')
 
 @notifications_bp.route('/mark-read/<int:id>')
 @login_required
@@ -55,16 +81,21 @@ def mark_read(id):
     notification.is_read = True
     db.session.commit()
     
+    if _wants_json():
+        return jsonify({'success': True})
     flash('Notification marked as read', 'success')
     return redirect(url_for('notifications.index'))
 
 @notifications_bp.route('/mark-all-read')
 @login_required
 def mark_all_read():
-    """Mark all notifications as read."""
-    Notification.query.update({Notification.is_read: True})
+    """Mark all notifications as read by moving the user's read cursor."""
+    read_through = inbox.mark_all_read(_current_user())
     db.session.commit()
+    notification_hub.publish_changed()
     
+    if _wants_json():
+        return jsonify({'success': True, 'read_through': read_through})
     flash('All notifications marked as read', 'success')
     return redirect(url_for('notifications.index'))
 
@@ -88,9 +119,8 @@ def create():
             lead_id=request.form.get('lead_id'),
             title=request.form['title'],
             message=request.form['message'],
-            notification_type=request.form.get('type', 'reminder'),
-            priority=request.form.get('priority', 'normal'),
-            action_date=request.form.get('action_date')
+            type=request.form.get('type', 'reminder'),
+            priority=request.form.get('priority', 'normal')
         )
         
         db.session.add(notification)
@@ -106,52 +136,121 @@ def create():
 @notifications_bp.route('/generate-reminders')
 @login_required
 def generate_reminders():
-    """Generate follow-up reminders for leads."""
-    today = datetime.utcnow().date()
-    
-    # Find leads that need follow-up
-    leads = Lead.query.filter(
-        Lead.next_followup <= today,
-        Lead.status.in_(['new', 'qualified'])
-    ).all()
-    
-    created_count = 0
-    for lead in leads:
-        # Check if there's already a notification for this lead
-        existing = Notification.query.filter(
-            Notification.lead_id == lead.id,
-            Notification.notification_type == 'reminder',
-            Notification.is_read == False
-        ).first()
-        
-        if not existing:
-            notification = Notification(
-                lead_id=lead.id,
-                title=f"Follow-up Reminder: {lead.name}",
-                message=f"It's time to follow up with {lead.name} from {lead.company}",
-                notification_type='reminder',
-                priority='normal',
-                action_date=today + timedelta(days=1)
-            )
-            db.session.add(notification)
-            created_count += 1
-    
-    db.session.commit()
-    flash(f'Generated {created_count} follow-up reminders', 'success')
-    return redirect(url_for('notifications.index'))
+    """Queue a background job to generate follow-up reminders."""
+    job_runner.submit('reminders')
+    flash('⏰ Generating follow-up reminders in the background', 'info')
+    return redirect(url_for('dashboard.index'))
 
 @notifications_bp.route('/api/count')
+@login_required
 def api_count():
-    """API endpoint to get unread notification count."""
-    count = Notification.query.filter(Notification.is_read == False).count()
-    return jsonify({'count': count})
+    """
+    API endpoint to get the current user's unread notification count.
+    
+    Polling fallback for the event stream: the ETag is the inbox version,
+    so an unchanged count is answered with 304 without counting anything.
+    """
+    version = inbox.inbox_version(session['user_id'])
+    if version in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = jsonify({'count': inbox.unread_count(_current_user()), 'cap': inbox.UNREAD_COUNT_CAP})
+    response.set_etag(version)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@notifications_bp.route('/stream')
+@login_required
+def stream():
+    """
+    Server-Sent Events stream of the current user's notifications.
+    
+    Sends 'count' events when the unread count changes and 'notification'
+    events for notifications created in this process. Answers 204 (the
+    browser then stops reconnecting and falls back to polling /api/count)
+    when this process already serves NOTIFICATION_STREAM_MAX_CLIENTS streams.
+    """
+    subscription = notification_hub.subscribe(limit=current_app.config.get('NOTIFICATION_STREAM_MAX_CLIENTS'))
+    if subscription is None:
+        return Response(status=204)
+    
+    app = current_app._get_current_object()
+    user_id = session['user_id']
+    
+    def sse(event, data):
+        return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+    
+    def count_event():
+        """Current count as an event, plus the version it was read at."""
+        version = inbox.inbox_version(user_id)
+        count = inbox.unread_count(db.session.get(User, user_id))
+        return version, sse('count', {'count': count, 'cap': inbox.UNREAD_COUNT_CAP})
+    
+    def events():
+        try:
+            # Each wake-up gets its own app context, so no database
+            # connection is held while the stream waits
+            with app.app_context():
+                version, message = count_event()
+            yield f'retry: {STREAM_RETRY_MS}\n\n' + message
+            
+            deadline = time.monotonic() + STREAM_MAX_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    event = subscription.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    event = None
+                
+                chunk = ''
+                if event is not None and event['type'] == 'notification':
+                    chunk += sse('notification', event['notification'])
+                with app.app_context():
+                    if inbox.inbox_version(user_id) != version:
+                        version, message = count_event()
+                        chunk += message
+                yield chunk or ': keep-alive\n\n'
+        finally:
+            notification_hub.unsubscribe(subscription)
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop nginx-style proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
 
 @notifications_bp.route('/api/recent')
+@login_required
 def api_recent():
-    """API endpoint to get recent notifications."""
-    notifications = Notification.query.filter(
-        Notification.is_read == False
-    ).order_by(Notification.created_at.desc()).limit(5).all()
+    """API endpoint to get the current user's most recent unread notifications."""
+    user = _current_user()
+    notifications, _ = inbox.inbox_page(user, unread_only=True, limit=5, options=NO_RELATIONSHIPS)
+    read_through = inbox.read_through(user)
+    
+    return jsonify([inbox.notification_dict(n, read_through) for n in notifications])
+
+@notifications_bp.route('/api/inbox')
+@login_required
+def api_inbox():
+    """
+    API endpoint for one page of the current user's inbox, newest first.
+    
+    Query params: cursor (next_cursor from the previous page), limit and
+    unread=1 for unread notifications only.
+    """
+    user = _current_user()
+    limit = min(max(request.args.get('limit', inbox.INBOX_PAGE_SIZE, type=int), 1), inbox.MAX_INBOX_PAGE_SIZE)
+    notifications, next_cursor = inbox.inbox_page(
+        user,
+        unread_only=request.args.get('unread') == '1',
+        before_id=request.args.get('cursor', type=int),
+        limit=limit,
+        options=NO_RELATIONSHIPS
+    )
+    read_through = inbox.read_through(user)
     
-    return jsonify([n.to_dict() for n in notifications])
+    return jsonify({
+        'notifications': [inbox.notification_dict(n, read_through) for n in notifications],
+        'next_cursor': next_cursor,
+        'unread_count': inbox.unread_count(user)
+    })
 
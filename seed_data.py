@@ -4,6 +4,7 @@ Seed database with sample leads for testing
 from app import create_app
 from database.db_instance import db
 from database.models import Lead, Notification
+from ai import lead_scorer
 from datetime import datetime, timedelta
 
 app = create_app()
@@ -145,25 +146,10 @@ def seed_data():
         
         db.session.commit()
         
-        # Calculate AI scores (simple formula: engagement_level * 10 + company_size points + budget points)
-        for lead in leads:
-            score = lead.engagement_level * 15
-            if lead.company_size == 'Large':
-                score += 20
-            elif lead.company_size == 'Medium':
-                score += 10
-            
-            if 'Immediate' in lead.timeline:
-                score += 15
-            elif '1-2' in lead.timeline or '2-3' in lead.timeline:
-                score += 10
-            
-            if '500k' in lead.budget_range or '200k' in lead.budget_range:
-                score += 10
-            elif '100k' in lead.budget_range or '50k' in lead.budget_range:
-                score += 5
-            
-            lead.ai_score = min(score, 100)
+        # Calculate AI scores in one batch
+        scores = lead_scorer.score_leads(leads)
+        for lead, score in zip(leads, scores.tolist()):
+            lead.ai_score = score
         
         db.session.commit()
         
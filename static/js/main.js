@@ -27,8 +27,11 @@ function initializeApp() {
     // Initialize data tables
     initDataTables();
     
-    // Start notification polling
-    startNotificationPolling();
+    // Keep the notification badge up to date
+    startNotificationStream();
+    
+    // Track background jobs shown on the page
+    initJobProgress();
 }
 
 /**
@@ -185,22 +188,93 @@ function updateNotificationCount() {
 }
 
 /**
- * Start polling for new notifications
+ * Show an unread count ({count, cap}) on the notification badge
+ */
+function setNotificationCount(data) {
+    const badge = document.getElementById('notification-count');
+    if (badge) {
+        badge.textContent = data.count >= data.cap ? `${data.cap}+` : data.count;
+        badge.style.display = data.count > 0 ? 'inline' : 'none';
+    }
+}
+
+/**
+ * Receive notification updates pushed by the server (Server-Sent Events)
+ */
+function startNotificationStream() {
+    if (!document.getElementById('notification-count')) {
+        return;
+    }
+    if (!window.EventSource) {
+        startNotificationPolling();
+        return;
+    }
+    
+    const source = new EventSource('/notifications/stream');
+    source.addEventListener('count', e => setNotificationCount(JSON.parse(e.data)));
+    source.addEventListener('notification', e => {
+        const notification = JSON.parse(e.data);
+        showAlert(`🔔 ${notification.title}`, 'info');
+    });
+    source.onerror = () => {
+        // The browser reconnects dropped streams by itself; CLOSED means the
+        // server turned the stream down (too many open), so poll instead
+        if (source.readyState === EventSource.CLOSED) {
+            startNotificationPolling();
+        }
+    };
+}
+
+/**
+ * Poll the unread count every 30 seconds (fallback for the event stream)
  */
 function startNotificationPolling() {
-    // Check for new notifications every 30 seconds
-    setInterval(() => {
-        fetch('/notifications/api/count')
+    const poll = () => {
+        // no-cache revalidates with If-None-Match: an unchanged count is a 304
+        fetch('/notifications/api/count', { cache: 'no-cache' })
             .then(response => response.json())
-            .then(data => {
-                const badge = document.getElementById('notification-count');
-                if (badge && data.count !== parseInt(badge.textContent)) {
-                    badge.textContent = data.count;
-                    badge.style.display = data.count > 0 ? 'inline' : 'none';
-                }
-            })
+            .then(setNotificationCount)
             .catch(error => console.error('Error polling notifications:', error));
-    }, 30000);
+    };
+    poll();
+    setInterval(poll, 30000);
+}
+
+/**
+ * Poll background jobs rendered with a data-job-id attribute
+ */
+function initJobProgress() {
+    document.querySelectorAll('.job-progress[data-job-id]').forEach(el => {
+        pollJob(el.dataset.jobId, el);
+    });
+}
+
+/**
+ * Poll a single job until it completes or fails
+ */
+function pollJob(jobId, el) {
+    fetch(`/jobs/${jobId}`)
+        .then(response => response.json())
+        .then(job => {
+            el.querySelector('.job-status').textContent = job.status;
+            el.querySelector('.job-bar').style.width = `${job.progress || 0}%`;
+            
+            const details = [];
+            if (job.total !== null) details.push(`${job.processed} / ${job.total}`);
+            if (job.leads_per_sec !== null) details.push(`${job.leads_per_sec} leads/sec`);
+            if (job.eta_seconds !== null) details.push(`ETA ${job.eta_seconds}s`);
+            el.querySelector('.job-detail').textContent = details.join(' · ');
+            
+            if (job.status === 'completed') {
+                el.querySelector('.job-bar').style.width = '100%';
+                showAlert(`Job "${job.kind}" completed`, 'success');
+            } else if (job.status === 'failed') {
+                showAlert(`Job "${job.kind}" failed: ${job.error}`, 'error');
+            } else {
+                setTimeout(() => pollJob(jobId, el), 2000);
+            }
+        })
+        .catch(error => console.error('Error polling job:', error));
 }
 
 /**
@@ -412,33 +486,57 @@ function loadDashboardStats() {
 }
 
 /**
- * Filter leads by status
+ * Filter leads by status (filtering happens on the server)
  */
 function filterLeadsByStatus(status) {
-    const rows = document.querySelectorAll('#leads-table tbody tr');
-    rows.forEach(row => {
-        const rowStatus = row.dataset.status;
-        if (status === 'all' || rowStatus === status) {
-            row.style.display = '';
-        } else {
-            row.style.display = 'none';
-        }
-    });
+    applyLeadFilter('status', status);
 }
 
 /**
- * Filter leads by priority
+ * Filter leads by priority (filtering happens on the server)
  */
 function filterLeadsByPriority(priority) {
-    const rows = document.querySelectorAll('#leads-table tbody tr');
-    rows.forEach(row => {
-        const rowPriority = row.dataset.priority;
-        if (priority === 'all' || rowPriority === priority) {
-            row.style.display = '';
-        } else {
-            row.style.display = 'none';
-        }
-    });
+    applyLeadFilter('priority', priority);
+}
+
+/**
+ * Reload the leads page with one filter changed
+ */
+function applyLeadFilter(name, value) {
+    const params = new URLSearchParams(window.location.search);
+    params.set(name, value);
+    params.delete('cursor');
+    window.location.search = params.toString();
+}
+
+/**
+ * Append the next page of leads to the leads table
+ */
+function loadMoreLeads() {
+    const button = document.getElementById('load-more-leads');
+    const tbody = document.querySelector('#leads-table tbody');
+    if (!button || !tbody) return;
+    
+    const params = new URLSearchParams(window.location.search);
+    params.set('cursor', button.dataset.nextCursor);
+    button.disabled = true;
+    
+    fetch(`/leads/api/leads?${params.toString()}`)
+        .then(response => response.json())
+        .then(data => {
+            tbody.insertAdjacentHTML('beforeend', data.rows_html);
+            if (data.next_cursor) {
+                button.dataset.nextCursor = data.next_cursor;
+                button.disabled = false;
+            } else {
+                button.remove();
+            }
+        })
+        .catch(error => {
+            console.error('Error loading leads:', error);
+            showAlert('Error loading more leads', 'error');
+            button.disabled = false;
+        });
 }
 
 /**
@@ -487,12 +585,12 @@ function exportLeadsToCSV() {
 }
 
 /**
- * Import leads from CSV
+ * Import leads from CSV or JSONL
  */
 function importLeadsFromCSV() {
     const input = document.createElement('input');
     input.type = 'file';
-    input.accept = '.csv';
+    input.accept = '.csv,.jsonl,.ndjson';
     input.onchange = function(e) {
         const file = e.target.files[0];
         if (file) {
@@ -508,8 +606,13 @@ function importLeadsFromCSV() {
             .then(response => response.json())
             .then(data => {
                 if (data.success) {
-                    showAlert(`Successfully imported ${data.imported_count} leads`, 'success');
-                    location.reload();
+                    let message = `Successfully imported ${data.imported_count} leads`;
+                    if (data.duplicate_count || data.error_count) {
+                        message += ` (${data.duplicate_count} duplicates, ${data.error_count} invalid rows skipped)`;
+                        console.table(data.errors);
+                    }
+                    showAlert(message, data.error_count ? 'warning' : 'success');
+                    setTimeout(() => location.reload(), 1500);
                 } else {
                     showAlert(data.message || 'Import failed', 'error');
                 }
@@ -534,9 +637,9 @@ function toggleAIInsights() {
 }
 
 /**
- * Batch actions for leads
+ * Batch actions for leads ('status' takes the new status)
  */
-function batchAction(action) {
+function batchAction(action, status) {
     const selectedLeads = Array.from(document.querySelectorAll('.lead-checkbox:checked'))
         .map(checkbox => checkbox.value);
     
@@ -561,6 +664,7 @@ function batchAction(action) {
         },
         body: JSON.stringify({
             action: action,
+            status: status,
             lead_ids: selectedLeads
         })
     })
@@ -581,6 +685,7 @@ function batchAction(action) {
 window.rescoreLead = rescoreLead;
 window.filterLeadsByStatus = filterLeadsByStatus;
 window.filterLeadsByPriority = filterLeadsByPriority;
+window.loadMoreLeads = loadMoreLeads;
 window.exportLeadsToCSV = exportLeadsToCSV;
 window.importLeadsFromCSV = importLeadsFromCSV;
 window.batchAction = batchAction;